@@ -0,0 +1,220 @@
+import math
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from flask import request, session, g
+
+# --- Admission Control Configuration ---
+# Limits are keyed by endpoint name. Each entry may set:
+#   user_rate / user_burst   -> token bucket per user (requests per second / bucket size)
+#   route_rate / route_burst -> token bucket shared by everyone hitting the route
+#   max_concurrent           -> how many requests may run the route at the same time
+#   public                   -> also apply the route limits to signed-out visitors
+# Any endpoint not listed here falls back to DEFAULT_LIMITS.
+# Signed-out requests to non-public routes only get a login redirect, so they
+# never touch the shared route buckets or semaphores; instead every signed-out
+# request counts against one bucket per IP address (ANONYMOUS_LIMITS). That IP is
+# request.remote_addr: behind a load balancer set TRUSTED_PROXY_HOPS (see create_app)
+# so it's the visitor's address, not the proxy's shared one.
+# Override by setting app.config['ADMISSION_LIMITS'] before calling init_admission().
+DEFAULT_LIMITS = {
+    'user_rate': 10.0,
+    'user_burst': 20,
+}
+
+ROUTE_LIMITS = {
+    'main.high_value_clients': {'user_rate': 0.5, 'user_burst': 5, 'route_rate': 5.0, 'route_burst': 10, 'max_concurrent': 4},
+    'main.properties': {'user_rate': 1.0, 'user_burst': 10, 'route_rate': 10.0, 'route_burst': 20, 'max_concurrent': 8},
+    'main.agent_sales_report': {'user_rate': 0.5, 'user_burst': 5, 'route_rate': 5.0, 'route_burst': 10, 'max_concurrent': 4},
+    # Signup runs CREATE USER / GRANT statements, so keep it tight
+    'main.signup': {'user_rate': 0.1, 'user_burst': 3, 'route_rate': 1.0, 'route_burst': 5, 'max_concurrent': 2, 'public': True},
+    # Bulk imports hold a write transaction per batch
+    'main.import_clients': {'user_rate': 0.1, 'user_burst': 3, 'route_rate': 1.0, 'route_burst': 5, 'max_concurrent': 2},
+}
+
+ANONYMOUS_LIMITS = {
+    'ip_rate': 5.0,
+    'ip_burst': 30,
+}
+
+MAX_USER_BUCKETS = 10000  # Least recently used per-user/per-IP buckets are dropped past this many
+
+
+# --- Token Bucket ---
+class TokenBucket:
+    """Classic token bucket: `rate` tokens are added per second, up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    def try_acquire(self):
+        """Takes one token. Returns 0 on success, otherwise the seconds until one is available."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            if self.rate <= 0:
+                return 60
+            return (1 - self.tokens) / self.rate
+
+
+# --- Admission Controller ---
+class AdmissionController:
+    def __init__(self, route_limits=None, default_limits=None, anonymous_limits=None):
+        self.route_limits = dict(ROUTE_LIMITS if route_limits is None else route_limits)
+        self.default_limits = dict(DEFAULT_LIMITS if default_limits is None else default_limits)
+        self.anonymous_limits = dict(ANONYMOUS_LIMITS if anonymous_limits is None else anonymous_limits)
+        self._lock = threading.Lock()
+        self._user_buckets = OrderedDict()  # LRU: oldest first
+        self._route_buckets = {}
+        self._semaphores = {}
+        self.admitted = defaultdict(int)
+        self.rejected = defaultdict(lambda: defaultdict(int))
+
+    def limits_for(self, endpoint):
+        return self.route_limits.get(endpoint, self.default_limits)
+
+    def _user_bucket(self, endpoint, user_key, rate, burst):
+        key = (endpoint, user_key)
+        with self._lock:
+            bucket = self._user_buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(rate, burst)
+                self._user_buckets[key] = bucket
+                if len(self._user_buckets) > MAX_USER_BUCKETS:
+                    # O(1) eviction; a dropped key just starts again with a full bucket
+                    self._user_buckets.popitem(last=False)
+            else:
+                self._user_buckets.move_to_end(key)
+            return bucket
+
+    def _route_bucket(self, endpoint, limits):
+        with self._lock:
+            bucket = self._route_buckets.get(endpoint)
+            if bucket is None:
+                bucket = TokenBucket(limits['route_rate'], limits['route_burst'])
+                self._route_buckets[endpoint] = bucket
+            return bucket
+
+    def _semaphore(self, endpoint, limits):
+        with self._lock:
+            semaphore = self._semaphores.get(endpoint)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(limits['max_concurrent'])
+                self._semaphores[endpoint] = semaphore
+            return semaphore
+
+    def _reject(self, endpoint, reason):
+        with self._lock:
+            self.rejected[endpoint][reason] += 1
+
+    def admit(self, endpoint, user_key, authenticated=True):
+        """
+        Checks the per-user and per-route limits for one request.
+        Returns (semaphore_or_None, None) when admitted, or (None, (status, retry_after)) when not.
+        A returned semaphore is already acquired and must be released by the caller.
+        Signed-out requests (`authenticated=False`, `user_key` is their IP) are only
+        held to the per-IP limit, plus the route limits of public routes.
+        """
+        limits = self.limits_for(endpoint)
+
+        if not authenticated:
+            if 'ip_rate' in self.anonymous_limits:
+                wait = self._user_bucket('*', user_key, self.anonymous_limits['ip_rate'], self.anonymous_limits['ip_burst']).try_acquire()
+                if wait:
+                    self._reject(endpoint, 'anonymous_rate')
+                    return None, (429, wait)
+            if not limits.get('public'):
+                with self._lock:
+                    self.admitted[endpoint] += 1
+                return None, None
+
+        if 'user_rate' in limits:
+            wait = self._user_bucket(endpoint, user_key, limits['user_rate'], limits['user_burst']).try_acquire()
+            if wait:
+                self._reject(endpoint, 'user_rate')
+                return None, (429, wait)
+
+        if 'route_rate' in limits:
+            wait = self._route_bucket(endpoint, limits).try_acquire()
+            if wait:
+                self._reject(endpoint, 'route_rate')
+                return None, (429, wait)
+
+        semaphore = None
+        if 'max_concurrent' in limits:
+            semaphore = self._semaphore(endpoint, limits)
+            # Fail fast rather than queueing; a queued request only adds to everyone's latency
+            if not semaphore.acquire(blocking=False):
+                self._reject(endpoint, 'concurrency')
+                return None, (503, 1)
+
+        with self._lock:
+            self.admitted[endpoint] += 1
+        return semaphore, None
+
+    def stats(self):
+        with self._lock:
+            endpoints = set(self.admitted) | set(self.rejected)
+            return {
+                endpoint: {
+                    'admitted': self.admitted.get(endpoint, 0),
+                    'rejected': dict(self.rejected.get(endpoint, {})),
+                }
+                for endpoint in sorted(endpoints)
+            }
+
+
+def _user_key():
+    """Returns (key, authenticated) for the current request."""
+    # Read the ID straight from the session so a rejected request never touches the DB
+    user_id = session.get('_user_id')
+    if user_id:
+        return f"user:{user_id}", True
+    return f"ip:{request.remote_addr}", False
+
+
+# --- Flask Integration ---
+def init_admission(app, exempt=()):
+    """
+    Registers the admission-control hooks on `app` and returns the controller.
+    Endpoints in `exempt` (e.g. health checks) are never limited.
+    """
+    controller = AdmissionController(app.config.get('ADMISSION_LIMITS'), anonymous_limits=app.config.get('ADMISSION_ANONYMOUS_LIMITS'))
+    exempt = set(exempt) | {'static'}
+
+    @app.before_request
+    def admission_check():
+        endpoint = request.endpoint
+        if endpoint is None or endpoint in exempt:
+            return None
+
+        semaphore, rejection = controller.admit(endpoint, *_user_key())
+        if rejection:
+            status, retry_after = rejection
+            message = "Too many requests" if status == 429 else "Server busy, please retry"
+            return message, status, {'Retry-After': str(max(1, math.ceil(retry_after)))}
+        g.admission_semaphore = semaphore
+        return None
+
+    @app.teardown_request
+    def admission_release(exc=None):
+        semaphore = g.pop('admission_semaphore', None)
+        if semaphore is not None:
+            semaphore.release()
+
+    app.extensions['admission'] = controller
+    return controller
@@ -1,18 +1,22 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash
+from flask import Flask, Blueprint, current_app, render_template, request, redirect, url_for, session, flash, jsonify
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
-import mysql.connector
+from werkzeug.local import LocalProxy
+from werkzeug.middleware.proxy_fix import ProxyFix
+from collections import Counter
+from datetime import date
+import click
+import csv
+import io
 import os
+import threading
+import time
 
 from werkzeug.security import generate_password_hash, check_password_hash
 
-# --- Flask App Setup ---
-app = Flask(__name__)
-app.secret_key = os.urandom(24) # Required for sessions
-
-# --- Flask-Login Setup ---
-login_manager = LoginManager()
-login_manager.init_app(app)
-login_manager.login_view = 'login' # Redirect to login page if not authenticated
+from cache import bump_table_version, etag_cached, cached_fragment, compress_response, get_data_version, source_fingerprint
+from admission import init_admission
+from repository import create_repository, ConnectionFailed, RemovalIncomplete, RepositoryError
+from repository.repository import EXPIRY_WINDOW_DAYS
 
 # --- Database Configuration ---
 # !!! IMPORTANT: Update these with your MySQL details !!!
@@ -23,6 +27,87 @@ db_config = {
     'database': 'real_estate_db'
 }
 
+# All routes live on this blueprint; create_app() builds the actual Flask app
+bp = Blueprint('main', __name__, cli_group=None)
+
+# --- Flask-Login Setup ---
+login_manager = LoginManager()
+login_manager.login_view = 'main.index' # Redirect to login page if not authenticated
+
+# --- App Factory ---
+def create_app(test_config=None):
+    """
+    Builds the app without touching the database. The repository (and MySQL pool)
+    is created on first use; warm_up() or the /readyz probe does that ahead of traffic.
+    """
+    app = Flask(__name__)
+    app.config.from_mapping(
+        SECRET_KEY=os.environ.get('SECRET_KEY') or os.urandom(24), # Required for sessions
+        # All SQL lives in the repository (see repository/). DB_BACKEND=sqlite runs against
+        # an in-process SQLite database instead (SQLITE_DATABASE defaults to :memory:).
+        DB_BACKEND=os.environ.get('DB_BACKEND', 'mysql'),
+        DB_CONFIG=db_config,
+        DB_POOL_SIZE=int(os.environ.get('DB_POOL_SIZE', '5')),
+        DB_POOL_TIMEOUT=float(os.environ.get('DB_POOL_TIMEOUT', '5')), # Seconds to wait for a free pooled connection
+        SQLITE_DATABASE=os.environ.get('SQLITE_DATABASE', ':memory:'),
+        ADMISSION_ENABLED=True,
+        # Proxies in front of the app that set X-Forwarded-For (e.g. 1 for a single load balancer).
+        # Only count hops you control: the header is client-supplied beyond them.
+        TRUSTED_PROXY_HOPS=int(os.environ.get('TRUSTED_PROXY_HOPS', '0')),
+        WARM_UP_ON_START=os.environ.get('WARM_UP_ON_START') == '1',
+        # Part of every ETag, so a deploy invalidates cached pages; set BUILD_ID (e.g. the git SHA) to override
+        BUILD_ID=os.environ.get('BUILD_ID') or source_fingerprint(os.path.dirname(os.path.abspath(__file__))),
+    )
+    if test_config:
+        app.config.update(test_config)
+    if app.config.get('REPOSITORY') is not None:
+        app.extensions['repository'] = app.config['REPOSITORY']
+
+    login_manager.init_app(app)
+
+    # --- Reverse Proxies ---
+    # Without this every signed-out visitor behind a proxy shares the proxy's IP,
+    # and with it one per-IP admission bucket
+    if app.config['TRUSTED_PROXY_HOPS']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXY_HOPS'])
+
+    # --- Response Compression ---
+    app.after_request(compress_response)
+
+    # --- Admission Control (rate limits + concurrency caps, see admission.py) ---
+    if app.config['ADMISSION_ENABLED']:
+        init_admission(app, exempt={'main.healthz', 'main.readyz'})
+
+    app.register_blueprint(bp)
+
+    app.extensions['startup'] = {'lock': threading.Lock(), 'ready': False, 'warm_up_seconds': None}
+    if app.config['WARM_UP_ON_START']:
+        threading.Thread(target=warm_up, args=(app,), daemon=True).start()
+    return app
+
+# --- Repository Access ---
+_repository_lock = threading.Lock()
+
+def get_repository():
+    """The current app's repository, created on first use."""
+    app = current_app._get_current_object()
+    repository = app.extensions.get('repository')
+    if repository is None:
+        with _repository_lock:
+            repository = app.extensions.get('repository')
+            if repository is None:
+                if app.config['DB_BACKEND'] == 'sqlite':
+                    repository = create_repository('sqlite', database=app.config['SQLITE_DATABASE'])
+                else:
+                    repository = create_repository(
+                        'mysql', config=app.config['DB_CONFIG'],
+                        pool_size=app.config['DB_POOL_SIZE'], pool_timeout=app.config['DB_POOL_TIMEOUT']
+                    )
+                app.extensions['repository'] = repository
+    return repository
+
+repo = LocalProxy(get_repository)
+
 # --- User Model for Flask-Login ---
 class User(UserMixin):
     def __init__(self, id, username, role, password_hash=None):
@@ -33,72 +118,64 @@ class User(UserMixin):
 
 @login_manager.user_loader
 def load_user(user_id):
-    conn = get_db_connection()
-    if not conn:
+    try:
+        user_data = repo.get_user(user_id)
+    except ConnectionFailed:
         return None
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT USER_ID, Email, Role, PasswordHash FROM user WHERE USER_ID = %s", (user_id,))
-    user_data = cursor.fetchone()
-    cursor.close()
-    conn.close()
     if user_data:
         return User(id=user_data['USER_ID'], username=user_data['Email'], role=user_data['Role'], password_hash=user_data['PasswordHash'])
     return None
 
-# --- Database Helper Function ---
-def get_db_connection():
-    try:
-        conn = mysql.connector.connect(**db_config)
-        return conn
-    except mysql.connector.Error as err:
-        print(f"Error connecting to database: {err}")
-        return None
+# --- Database Helper Functions ---
+def load_table_versions():
+    """The shared per-table change counters used by the HTTP caches (see cache.py)."""
+    return repo.table_versions()
+
+def mark_tables_changed(*tables):
+    """Call after a write commits: invalidates the cached pages that read `tables`."""
+    bump_table_version(repo.bump_table_versions, *tables)
+
+@bp.app_errorhandler(ConnectionFailed)
+def database_unavailable(err):
+    print(f"Error connecting to database: {err}")
+    flash("Database connection failed.", "error")
+    return redirect(url_for('main.index'))
 
 # --- Main Login/Logout Routes ---
-@app.route("/")
+@bp.route("/")
 def index():
     """Serves the login page."""
     return render_template('login.html')
 
-@app.route("/login", methods=['POST'])
+@bp.route("/login", methods=['POST'])
 def login():
     name = request.form['name']
     password = request.form['password']
 
-    conn = get_db_connection()
-    if not conn:
-        return "Database connection failed", 500
-    cursor = conn.cursor(dictionary=True)
+    user_data = repo.get_user_by_email(name)
 
-    query = "SELECT * FROM user WHERE Email = %s"
-    cursor.execute(query, (name,))
-    user_data = cursor.fetchone()
-    
     if user_data and check_password_hash(user_data['PasswordHash'], password):
         user = User(id=user_data['USER_ID'], username=user_data['Email'], role=user_data['Role'], password_hash=user_data['PasswordHash'])
         login_user(user)
         
         if user.role == 'Admin':
-            return redirect(url_for('admin_dashboard'))
+            return redirect(url_for('main.admin_dashboard'))
         elif user.role == 'Agent':
-            return redirect(url_for('agent_dashboard'))
+            return redirect(url_for('main.agent_dashboard'))
         else:
-            return redirect(url_for('client_dashboard'))
+            return redirect(url_for('main.client_dashboard'))
     else:
         flash("Invalid name or password.", "error")
-        return redirect(url_for('index'))
-    
-    cursor.close()
-    conn.close()
+        return redirect(url_for('main.index'))
 
-@app.route("/logout")
+@bp.route("/logout")
 @login_required
 def logout():
     logout_user()
     flash("You have been logged out.", "success")
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route("/signup", methods=['GET', 'POST'])
+@bp.route("/signup", methods=['GET', 'POST'])
 def signup():
     if request.method == 'POST':
         name = request.form['name']
@@ -108,69 +185,29 @@ def signup():
 
         if password != confirm_password:
             flash('Passwords do not match.', 'error')
-            return redirect(url_for('signup'))
-
-        conn = get_db_connection()
-        if not conn:
-            flash('Database connection failed.', 'error')
-            return redirect(url_for('signup'))
-        cursor = conn.cursor(dictionary=True)
+            return redirect(url_for('main.signup'))
 
         # Check if user already exists
-        cursor.execute("SELECT * FROM user WHERE Email = %s", (name,))
-        if cursor.fetchone():
+        if repo.get_user_by_email(name):
             flash('Name already registered.', 'error')
-            cursor.close()
-            conn.close()
-            return redirect(url_for('signup'))
+            return redirect(url_for('main.signup'))
 
-        # Hash the password and insert new user
+        # Hash the password and insert new user (plus their client or agent row)
         password_hash = generate_password_hash(password)
-        cursor.execute("INSERT INTO user (Email, PasswordHash, Role) VALUES (%s, %s, %s)", (name, password_hash, role))
-        conn.commit()
-        
-        # Also need to add to client or agent table
-        user_id = cursor.lastrowid
-        if role == 'Client':
-            cursor.execute("INSERT INTO client (CLIENT_ID, Name) VALUES (%s, %s)", (user_id, name))
-            conn.commit()
-            
-            # Create a new MySQL user for the client with read-only privileges
-            try:
-                # Use a separate cursor without dictionary=True for this
-                nondict_cursor = conn.cursor()
-                nondict_cursor.execute(f"CREATE USER '{name}'@'localhost' IDENTIFIED BY '{password}'")
-                nondict_cursor.execute(f"GRANT SELECT ON real_estate_db.* TO '{name}'@'localhost'")
-                conn.commit()
-                flash(f"MySQL user for client '{name}' created with read-only privileges.", "info")
-                nondict_cursor.close()
-            except mysql.connector.Error as err:
-                flash(f"Could not create MySQL user for client '{name}': {err}", "error")
-        elif role == 'Agent':
-            commission_perc = request.form.get('commission_perc')
-            cursor.execute("INSERT INTO agent (AGENT_ID, Name, CommissionPerc) VALUES (%s, %s, %s)", (user_id, name, commission_perc))
-            conn.commit()
-            
-            # Create a new MySQL user for the agent with limited privileges
+        repo.register_user(name, password_hash, role, request.form.get('commission_perc'))
+        mark_tables_changed('user', 'client' if role == 'Client' else 'agent')
+
+        # Create a matching MySQL user: read-only for clients, limited privileges for agents
+        if role in ('Client', 'Agent') and repo.backend.supports_db_logins:
             try:
-                # Use a separate cursor without dictionary=True for this
-                nondict_cursor = conn.cursor()
-                nondict_cursor.execute(f"CREATE USER '{name}'@'localhost' IDENTIFIED BY '{password}'")
-                nondict_cursor.execute(f"GRANT SELECT, INSERT, UPDATE ON real_estate_db.property TO '{name}'@'localhost'")
-                nondict_cursor.execute(f"GRANT SELECT, INSERT, UPDATE ON real_estate_db.client TO '{name}'@'localhost'")
-                nondict_cursor.execute(f"GRANT SELECT, INSERT, UPDATE ON real_estate_db.contract TO '{name}'@'localhost'")
-                conn.commit()
-                flash(f"MySQL user for agent '{name}' created with limited privileges.", "info")
-                nondict_cursor.close()
-            except mysql.connector.Error as err:
-                flash(f"Could not create MySQL user for agent '{name}': {err}", "error")
-
-
-        cursor.close()
-        conn.close()
+                repo.create_db_login(name, password, role)
+                privileges = 'read-only' if role == 'Client' else 'limited'
+                flash(f"MySQL user for {role.lower()} '{name}' created with {privileges} privileges.", "info")
+            except RepositoryError as err:
+                flash(f"Could not create MySQL user for {role.lower()} '{name}': {err}", "error")
 
         flash('Account created successfully! Please log in.', 'success')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
 
     return render_template('signup.html')
 
@@ -182,227 +219,138 @@ def is_admin():
 def is_agent():
     return current_user.is_authenticated and current_user.role == 'Agent'
 
+# --- Admin Report Fragments ---
+# The table bodies of the admin report pages don't depend on which admin is
+# looking, so one cached copy serves them all (per_user=False). warm_up()
+# renders them ahead of the first request.
+def property_rows_fragment():
+    def render_rows():
+        # This is a 3-table JOIN query
+        return render_template('fragments/property_rows.html', properties=repo.properties_page())
+
+    return cached_fragment('property_rows', ('property', 'agent', 'client'), load_table_versions, render_rows, per_user=False)
+
+def payment_rows_fragment():
+    def render_rows():
+        return render_template('fragments/payment_rows.html', payments=repo.list_payments())
+
+    return cached_fragment('payment_rows', ('payment',), load_table_versions, render_rows, per_user=False)
+
+def high_value_client_rows_fragment():
+    def render_rows():
+        return render_template('fragments/high_value_client_rows.html', clients=repo.high_value_clients(limit=10))
+
+    return cached_fragment('high_value_client_rows', ('client', 'contract', 'payment'), load_table_versions, render_rows, per_user=False)
+
+ADMIN_FRAGMENTS = (property_rows_fragment, payment_rows_fragment, high_value_client_rows_fragment)
+
 # -----------------------------------------------------------------
 # REQUIREMENT 1: 1 Aggregate Query with GUI
 # -----------------------------------------------------------------
-@app.route("/admin_dashboard")
+@bp.route("/admin_dashboard")
 @login_required
 def admin_dashboard():
     if not is_admin():
-        return redirect(url_for('index'))
-        
-    conn = get_db_connection()
-    if not conn:
-        flash("Database connection failed.", "error")
-        return redirect(url_for('index'))
-    cursor = conn.cursor(dictionary=True)
-    
-    # Aggregate Query 1: Total Clients
-    cursor.execute("SELECT COUNT(*) AS client_count FROM client")
-    stat_clients = cursor.fetchone()
+        return redirect(url_for('main.index'))
 
-    # Aggregate Query 2: Total Agents
-    cursor.execute("SELECT COUNT(*) AS agent_count FROM agent")
-    stat_agents = cursor.fetchone()
-
-    # Aggregate Query 3: Total Properties
-    cursor.execute("SELECT COUNT(*) AS property_count FROM property")
-    stat_properties = cursor.fetchone()
-    
-    # Aggregate Query 4: SUM of Payments
-    cursor.execute("SELECT SUM(Amount) AS total_payment FROM payment")
-    stat_payment = cursor.fetchone()
-    
-    stats = {
-        'client_count': stat_clients['client_count'],
-        'agent_count': stat_agents['agent_count'],
-        'property_count': stat_properties['property_count'],
-        'total_payment': stat_payment['total_payment']
-    }
-    
-    cursor.close()
-    conn.close()
-    
+    # Aggregate Queries: total clients, agents, properties and SUM of payments
+    stats = repo.admin_stats()
     return render_template('admin_dashboard.html', stats=stats)
 
 # -----------------------------------------------------------------
 # REQUIREMENT 2: 1 Join Query with GUI
 # -----------------------------------------------------------------
-@app.route("/properties")
+@bp.route("/properties")
 @login_required
+@etag_cached(load_table_versions, 'property', 'agent', 'client')
 def properties():
     if not is_admin():
-        return redirect(url_for('index'))
-        
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    # This is a 3-table JOIN query
-    query = """
-        SELECT 
-            p.PROPERTY_ID, p.Street, p.PRICE, 
-            a.Name AS AgentName, 
-            c.Name AS ClientName
-        FROM property p
-        JOIN agent a ON p.AGENT_ID = a.AGENT_ID
-        JOIN client c ON p.CLIENT_ID = c.CLIENT_ID
-        ORDER BY p.PRICE DESC
-    """
-    cursor.execute(query)
-    properties = cursor.fetchall()
-    
-    cursor.close()
-    conn.close()
-    
-    return render_template('property_list.html', properties=properties)
+        return redirect(url_for('main.index'))
+
+    return render_template('property_list.html', property_rows=property_rows_fragment())
 
 # -----------------------------------------------------------------
 # REQUIREMENT 3: 1 Nested Query with GUI
 # -----------------------------------------------------------------
-@app.route("/agent_search", methods=['GET', 'POST'])
+@bp.route("/agent_search", methods=['GET', 'POST'])
 @login_required
 def agent_search():
     if not is_admin():
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
     agents = []
     city = ""
     if request.method == 'POST':
         city = request.form['city']
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
         # This is a NESTED query
-        query = """
-            SELECT * FROM agent 
-            WHERE OFFICE_ID IN (
-                SELECT OFFICE_ID FROM office WHERE City = %s
-            )
-        """
-        cursor.execute(query, (city,))
-        agents = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
+        agents = repo.agents_in_city(city)
         
     return render_template('agent_search.html', agents=agents, city=city)
 
 # -----------------------------------------------------------------
 # REQUIREMENT 4: Triggers with GUI
 # -----------------------------------------------------------------
-@app.route("/edit_property/<int:id>", methods=['GET', 'POST'])
+@bp.route("/edit_property/<int:id>", methods=['GET', 'POST'])
 @login_required
 def edit_property(id):
     if not is_admin():
-        return redirect(url_for('index'))
-
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+        return redirect(url_for('main.index'))
 
     if request.method == 'POST':
         new_price = request.form['price']
         
         # This UPDATE will fire the 'trg_PropertyPriceAudit' trigger
         # This is the "Triggers with GUI" part.
-        cursor.execute("UPDATE property SET PRICE = %s WHERE PROPERTY_ID = %s", (new_price, id))
-        conn.commit()
+        repo.update_property_price(id, new_price)
+        mark_tables_changed('property')
         flash(f"Property {id} price updated. Trigger fired!", "success")
-        
-        cursor.close()
-        conn.close()
-        return redirect(url_for('properties'))
+        return redirect(url_for('main.properties'))
 
     # GET request: Show the edit form
-    cursor.execute("SELECT * FROM property WHERE PROPERTY_ID = %s", (id,))
-    prop = cursor.fetchone()
-    cursor.close()
-    conn.close()
+    prop = repo.get_property(id)
     return render_template('edit_property.html', prop=prop)
 
 # -----------------------------------------------------------------
 # REQUIREMENT 5: Procedures/Functions with GUI
 # -----------------------------------------------------------------
-@app.route("/payments")
+@bp.route("/payments")
 @login_required
+@etag_cached(load_table_versions, 'payment')
 def payments():
     if not is_admin():
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    # Get payments that haven't had commission calculated yet
-    query = """
-        SELECT p.* FROM payment p
-        LEFT JOIN commission comm ON comm.COMMISSION_ID IN (
-            SELECT e.COMMISSION_ID FROM earns e WHERE e.AGENT_ID IN (
-                SELECT c.AGENT_ID FROM contract c WHERE c.CONTRACT_ID = p.CONTRACT_ID
-            )
-        )
-        WHERE comm.COMMISSION_ID IS NULL
-    """ # This is a complex query, a simple "SELECT * FROM payment" also works
-    
-    cursor.execute("SELECT * FROM payment")
-    payments = cursor.fetchall()
-    
-    cursor.close()
-    conn.close()
-    return render_template('payments.html', payments=payments)
+    return render_template('payments.html', payment_rows=payment_rows_fragment())
 
-@app.route("/add_payment", methods=['GET', 'POST'])
+@bp.route("/add_payment", methods=['GET', 'POST'])
 @login_required
 def add_payment():
     if not is_admin():
-        return redirect(url_for('index'))
-    
-    conn = get_db_connection()
-    if not conn:
-        flash("Database connection failed.", "error")
-        return redirect(url_for('admin_dashboard'))
-    cursor = conn.cursor(dictionary=True)
+        return redirect(url_for('main.index'))
 
     if request.method == 'POST':
         contract_id = request.form['contract_id']
         payment_date = request.form['payment_date']
         amount = request.form['amount']
         
-        query = "INSERT INTO payment (Payment_Date, Amount, CONTRACT_ID) VALUES (%s, %s, %s)"
-        cursor.execute(query, (payment_date, amount, contract_id))
-        conn.commit()
-
-        cursor.close()
-        conn.close()
+        repo.add_payment(payment_date, amount, contract_id)
+        mark_tables_changed('payment')
 
         flash('Payment added successfully!', 'success')
-        return redirect(url_for('payments'))
+        return redirect(url_for('main.payments'))
 
     # For GET request, we need to fetch contracts to populate a dropdown
-    cursor.execute("""
-        SELECT c.CONTRACT_ID, cl.Name AS ClientName, a.Name AS AgentName
-        FROM contract c
-        JOIN client cl ON c.CLIENT_ID = cl.CLIENT_ID
-        JOIN agent a ON c.AGENT_ID = a.AGENT_ID
-    """)
-    contracts = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    
+    contracts = repo.contract_choices()
     return render_template('add_payment.html', contracts=contracts)
 
 # -----------------------------------------------------------------
 # REQUIREMENT 7: Functions with GUI
 # -----------------------------------------------------------------
-@app.route("/agent_sales_report", methods=['GET', 'POST'])
+@bp.route("/agent_sales_report", methods=['GET', 'POST'])
 @login_required
 def agent_sales_report():
     if not is_admin():
-        return redirect(url_for('index'))
-    
-    conn = get_db_connection()
-    if not conn:
-        flash("Database connection failed.", "error")
-        return redirect(url_for('admin_dashboard')) # Or an appropriate error page
-    cursor = conn.cursor(dictionary=True)
+        return redirect(url_for('main.index'))
     
     total_sales = None
     agent_id_selected = None
@@ -413,23 +361,14 @@ def agent_sales_report():
             
             # This is the "Function with GUI" part.
             # We call the function 'fn_GetAgentTotalSales'
-            query = "SELECT fn_GetAgentTotalSales(%s) AS sales"
-            
-            cursor.execute(query, (agent_id_selected,))
-            result = cursor.fetchone()
-            if result:
-                total_sales = result['sales']
+            total_sales = repo.agent_total_sales(agent_id_selected)
             flash(f"Total sales calculated for Agent ID {agent_id_selected}.", "success")
             
-    except mysql.connector.Error as err:
+    except RepositoryError as err:
         flash(f"Error calculating sales: {err}", "error")
-    finally:
-        # GET or POST: We always need the list of agents for the dropdown
-        cursor.execute("SELECT AGENT_ID, Name FROM agent")
-        agents = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
+
+    # GET or POST: We always need the list of agents for the dropdown
+    agents = repo.list_agents()
     
     return render_template(
         'agent_sales_report.html', 
@@ -440,94 +379,108 @@ def agent_sales_report():
 
 
 
-@app.route('/high_value_clients')
+@bp.route('/high_value_clients')
 @login_required
+@etag_cached(load_table_versions, 'client', 'contract', 'payment')
 def high_value_clients():
     if not is_admin():
         flash('Unauthorized access.', 'danger')
-        return redirect(url_for('index'))
-
-    conn = get_db_connection()
-    if not conn:
-        flash("Database connection failed.", "error")
-        return redirect(url_for('admin_dashboard'))
-    cursor = conn.cursor(dictionary=True)
-
-    query = """
-        SELECT
-            cl.CLIENT_ID,
-            cl.Name,
-            COUNT(p.Payment_No) AS NumPayments,
-            SUM(p.Amount) AS TotalPayments
-        FROM client cl
-        JOIN contract c ON cl.CLIENT_ID = c.CLIENT_ID
-        JOIN payment p ON c.CONTRACT_ID = p.CONTRACT_ID
-        GROUP BY cl.CLIENT_ID, cl.Name
-        ORDER BY TotalPayments DESC
-        LIMIT 10
-    """
-    cursor.execute(query)
-    clients = cursor.fetchall()
+        return redirect(url_for('main.index'))
+
+    return render_template('high_value_clients.html', client_rows=high_value_client_rows_fragment())
+
+@bp.route('/admission_stats')
+@login_required
+def admission_stats():
+    """Per-route counts of admitted and rejected requests."""
+    if not is_admin():
+        flash('Unauthorized access.', 'danger')
+        return redirect(url_for('main.index'))
+    admission = current_app.extensions.get('admission')
+    return jsonify(admission.stats() if admission else {})
 
-    cursor.close()
-    conn.close()
+# Tables whose cached pages go stale when accounts are removed
+ACCOUNT_REMOVAL_TABLES = ('user', 'client', 'agent', 'property', 'contract', 'payment', 'commission', 'earns', 'clientphone')
 
-    return render_template('high_value_clients.html', clients=clients)
+def describe_counts(counts):
+    return ", ".join(f"{n} {table}" for table, n in counts.items() if n) or "nothing"
 
-@app.route('/delete_user/<int:user_id>')
+@bp.route('/delete_user/<int:user_id>')
 @login_required
 def delete_user(user_id):
+    """Single-account removal goes through the same preview and confirmation as bulk removal."""
     if not is_admin():
         flash('Unauthorized access.', 'danger')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
+    return redirect(url_for('main.remove_accounts', user_ids=user_id))
 
-    conn = get_db_connection()
-    if not conn:
-        flash("Database connection failed.", "error")
-        return redirect(url_for('admin_dashboard'))
-    cursor = conn.cursor(dictionary=True)
+@bp.route('/remove_accounts', methods=['GET', 'POST'])
+@login_required
+def remove_accounts():
+    """
+    Bulk account cleanup: preview what would be removed (GET with filters, or POST
+    'preview'), then POST 'remove' to remove exactly the previewed accounts in batches.
+    """
+    if not is_admin():
+        flash('Unauthorized access.', 'danger')
+        return redirect(url_for('main.index'))
 
+    form = request.form if request.method == 'POST' else request.args
+    plan = None
+    user_ids = []
     try:
-        # Get user role before deleting
-        cursor.execute("SELECT Role, CLIENT_ID, AGENT_ID FROM user WHERE USER_ID = %s", (user_id,))
-        user = cursor.fetchone()
-
-        if user:
-            # Delete from user table
-            cursor.execute("DELETE FROM user WHERE USER_ID = %s", (user_id,))
-
-            # Delete from client or agent table
-            if user['Role'] == 'Client' and user['CLIENT_ID']:
-                cursor.execute("DELETE FROM client WHERE CLIENT_ID = %s", (user['CLIENT_ID'],))
-            elif user['Role'] == 'Agent' and user['AGENT_ID']:
-                cursor.execute("DELETE FROM agent WHERE AGENT_ID = %s", (user['AGENT_ID'],))
-            
-            conn.commit()
-            flash(f"User ID {user_id} has been deleted.", "success")
-        else:
-            flash(f"User ID {user_id} not found.", "warning")
-
-    except mysql.connector.Error as err:
-        conn.rollback()
-        flash(f"Error deleting user: {err}. This user might be referenced in other records (e.g., properties, contracts).", "error")
-    finally:
-        cursor.close()
-        conn.close()
+        listed_ids = [int(x) for x in form.get('user_ids', '').replace(',', ' ').split()]
+        previewed_ids = [int(x) for x in form.getlist('previewed_ids')]
+        reassign_agent_id = int(form['reassign_agent_id']) if form.get('reassign_agent_id') else None
+    except ValueError:
+        flash("User IDs and the reassignment agent ID must be numbers.", "error")
+        return render_template('remove_accounts.html', form=form, plan=None, user_ids=[])
+
+    if request.method == 'POST' and form.get('action') == 'remove':
+        if not previewed_ids:
+            flash("Preview the accounts before removing them.", "warning")
+            return render_template('remove_accounts.html', form=form, plan=None, user_ids=[])
+        counts = Counter()
+        try:
+            counts = repo.remove_accounts(
+                previewed_ids, reassign_agent_id=reassign_agent_id,
+                delete_owned=bool(form.get('confirm_delete_owned'))
+            )
+            flash(f"Removed {counts['user']} account(s): {describe_counts(counts)}.", "success")
+            return redirect(url_for('main.admin_dashboard'))
+        except ValueError as err:
+            flash(str(err), "error")
+        except RemovalIncomplete as err:
+            counts = err.counts
+            flash(f"Removal stopped part-way ({err}). Already removed: {describe_counts(counts)}.", "error")
+        except RepositoryError as err:
+            flash(f"Error removing accounts: {err}", "error")
+        finally:
+            if sum(counts.values()):
+                mark_tables_changed(*ACCOUNT_REMOVAL_TABLES)
+        # Show what's left of the previewed set
+        user_ids = repo.find_user_ids(previewed_ids)
+    elif listed_ids or form.get('role') or form.get('email_contains'):
+        user_ids = repo.find_user_ids(listed_ids, form.get('role'), form.get('email_contains'))
+        if not user_ids:
+            flash("No users match those filters.", "warning")
+
+    if user_ids:
+        try:
+            plan = repo.plan_account_removal(user_ids, reassign_agent_id=reassign_agent_id)
+        except ValueError as err:
+            flash(str(err), "error")
+        except RepositoryError as err:
+            flash(f"Error previewing removal: {err}", "error")
 
-    return redirect(url_for('admin_dashboard'))
+    return render_template('remove_accounts.html', form=form, plan=plan, user_ids=user_ids)
 
-@app.route('/add_commission', methods=['GET', 'POST'])
+@bp.route('/add_commission', methods=['GET', 'POST'])
 @login_required
 def add_commission():
     if not is_admin():
         flash('Unauthorized access.', 'danger')
-        return redirect(url_for('index'))
-    
-    conn = get_db_connection()
-    if not conn:
-        flash("Database connection failed.", "error")
-        return redirect(url_for('admin_dashboard'))
-    cursor = conn.cursor(dictionary=True)
+        return redirect(url_for('main.index'))
 
     if request.method == 'POST':
         agent_id = request.form['agent_id']
@@ -536,104 +489,73 @@ def add_commission():
         earned_date = request.form['earned_date']
         
         try:
-            # Insert into commission table
-            cursor.execute("INSERT INTO commission (Amount, Percentage) VALUES (%s, %s)", (amount, percentage))
-            commission_id = cursor.lastrowid
-
-            # Insert into earns table
-            cursor.execute("INSERT INTO earns (AGENT_ID, COMMISSION_ID, Earned_Date) VALUES (%s, %s, %s)", (agent_id, commission_id, earned_date))
-            
-            conn.commit()
+            # Insert into commission table, then link it in earns
+            repo.add_commission(agent_id, amount, percentage, earned_date)
+            mark_tables_changed('commission', 'earns')
             flash('Commission added successfully!', 'success')
-        except mysql.connector.Error as err:
-            conn.rollback()
+        except RepositoryError as err:
             flash(f"Database error: {err}", "error")
         
-        return redirect(url_for('admin_dashboard'))
+        return redirect(url_for('main.admin_dashboard'))
 
     # For GET request, we need to fetch agents to populate a dropdown
-    cursor.execute("SELECT AGENT_ID, Name FROM agent")
-    agents = cursor.fetchall()
-    
-    cursor.close()
-    conn.close()
-    
+    agents = repo.list_agents()
     return render_template('add_commission.html', agents=agents)
 
 # --- Placeholder Dashboards for Agent/Client ---
-@app.route("/agent_dashboard")
+@bp.route("/agent_dashboard")
 @login_required
 def agent_dashboard():
     if current_user.role != 'Agent':
-        return redirect(url_for('index'))
-
-    conn = get_db_connection()
-    if not conn:
-        flash("Database connection failed.", "error")
-        return redirect(url_for('index'))
-    cursor = conn.cursor(dictionary=True)
+        return redirect(url_for('main.index'))
 
     # Fetch earnings for the logged-in agent
-    query = """
-        SELECT c.Amount, c.Percentage, e.Earned_Date
-        FROM commission c
-        JOIN earns e ON c.COMMISSION_ID = e.COMMISSION_ID
-        WHERE e.AGENT_ID = %s
-    """
-    cursor.execute(query, (current_user.id,))
-    earnings = cursor.fetchall()
-
+    earnings = repo.agent_earnings(current_user.id)
     total_earnings = sum(item['Amount'] or 0 for item in earnings)
 
-    cursor.close()
-    conn.close()
-
     return render_template('agent_dashboard.html', earnings=earnings, total_earnings=total_earnings)
 
-@app.route("/client_dashboard")
+@bp.route("/expiring_contracts")
 @login_required
+def expiring_contracts():
+    """Contracts ending soon for the logged-in agent, as found by `flask expire-contracts`."""
+    if not is_agent():
+        flash('Unauthorized access.', 'danger')
+        return redirect(url_for('main.index'))
+
+    today = date.today()
+    contracts = repo.expiring_contracts_for_agent(current_user.id, today)
+    for c in contracts:
+        c['DaysLeft'] = (c['End_Date'] - today).days
+
+    return render_template('expiring_contracts.html', contracts=contracts)
+
+@bp.route("/client_dashboard")
+@login_required
+@etag_cached(load_table_versions, 'payment', 'contract', 'property')
 def client_dashboard():
     if current_user.role != 'Client':
-        return redirect(url_for('index'))
-
-    conn = get_db_connection()
-    if not conn:
-        flash("Database connection failed.", "error")
-        return redirect(url_for('index'))
-    cursor = conn.cursor(dictionary=True)
-
-    # Fetch payments for the logged-in client
-    query_payments = """
-        SELECT p.Payment_Date, p.CONTRACT_ID, p.Amount
-        FROM payment p
-        JOIN contract c ON p.CONTRACT_ID = c.CONTRACT_ID
-        WHERE c.CLIENT_ID = %s
-    """
-    cursor.execute(query_payments, (current_user.id,))
-    payments = cursor.fetchall()
+        return redirect(url_for('main.index'))
 
-    # Fetch properties for the logged-in client
-    query_properties = "SELECT * FROM property WHERE CLIENT_ID = %s"
-    cursor.execute(query_properties, (current_user.id,))
-    properties = cursor.fetchall()
+    def render_payment_rows():
+        # Fetch payments for the logged-in client
+        return render_template('fragments/client_payment_rows.html', payments=repo.client_payments(current_user.id))
 
-    cursor.close()
-    conn.close()
+    def render_property_rows():
+        # Fetch properties for the logged-in client
+        return render_template('fragments/client_property_rows.html', properties=repo.client_properties(current_user.id))
 
-    return render_template('client_dashboard.html', payments=payments, properties=properties)
+    payment_rows = cached_fragment('client_payment_rows', ('payment', 'contract'), load_table_versions, render_payment_rows)
+    property_rows = cached_fragment('client_property_rows', ('property',), load_table_versions, render_property_rows)
 
-@app.route("/add_client", methods=['GET', 'POST'])
+    return render_template('client_dashboard.html', payment_rows=payment_rows, property_rows=property_rows)
+
+@bp.route("/add_client", methods=['GET', 'POST'])
 @login_required
 def add_client():
     if not is_agent():
         flash('Unauthorized access.', 'danger')
-        return redirect(url_for('index'))
-    
-    conn = get_db_connection()
-    if not conn:
-        flash("Database connection failed.", "error")
-        return redirect(url_for('agent_dashboard'))
-    cursor = conn.cursor(dictionary=True)
+        return redirect(url_for('main.index'))
 
     client_selected = None
     if request.method == 'POST':
@@ -646,60 +568,100 @@ def add_client():
         state = request.form['state']
         zip_code = request.form['zip']
         
-        # Update client details
+        # Update client details and phone number
         try:
-            cursor.execute("""
-                UPDATE client 
-                SET Fname = %s, Lname = %s, AddressStreet = %s, City = %s, State = %s, ZIPCode = %s 
-                WHERE CLIENT_ID = %s
-            """, (fname, lname, street, city, state, zip_code, client_id))
-            
-            # Update or insert phone number
-            cursor.execute("SELECT * FROM clientphone WHERE CLIENT_ID = %s", (client_id,))
-            if cursor.fetchone():
-                if phone:
-                    cursor.execute("UPDATE clientphone SET PhoneNumber = %s WHERE CLIENT_ID = %s", (phone, client_id))
-                else:
-                    cursor.execute("DELETE FROM clientphone WHERE CLIENT_ID = %s", (client_id,))
-            elif phone:
-                cursor.execute("INSERT INTO clientphone (CLIENT_ID, PhoneNumber) VALUES (%s, %s)", (client_id, phone))
-            
-            conn.commit()
+            repo.update_client_profile(client_id, fname, lname, street, city, state, zip_code, phone)
+            mark_tables_changed('client', 'clientphone')
             flash(f"Client details for ID {client_id} updated successfully!", "success")
-        except mysql.connector.Error as err:
-            flash(f"Database error: {err}. Please ensure the client table has address columns (AddressStreet, City, State, ZIPCode).", "error")
+        except RepositoryError as err:
+            flash(str(err), "error")
         
-        return redirect(url_for('agent_dashboard'))
+        return redirect(url_for('main.agent_dashboard'))
     else: # GET request
         client_id_param = request.args.get('client_id')
         if client_id_param:
             try:
-                cursor.execute("""
-                    SELECT c.CLIENT_ID, c.Name, c.Fname, c.Lname, c.AddressStreet, c.City, c.State, c.ZIPCode, cp.PhoneNumber
-                    FROM client c
-                    LEFT JOIN clientphone cp ON c.CLIENT_ID = cp.CLIENT_ID
-                    WHERE c.CLIENT_ID = %s
-                """, (client_id_param,))
-                client_selected = cursor.fetchone()
-            except mysql.connector.Error as err:
+                client_selected = repo.get_client_profile(client_id_param)
+            except RepositoryError as err:
                 flash(f"Database error: {err}. The client table may be missing address columns.", "error")
 
 
     # Fetch all clients for the dropdown
-    cursor.execute("SELECT CLIENT_ID, Name FROM client")
-    clients = cursor.fetchall()
-    
-    cursor.close()
-    conn.close()
-
+    clients = repo.list_clients()
     return render_template('add_client.html', clients=clients, client_selected=client_selected)
 
-@app.route("/add_property", methods=['GET', 'POST'])
+CLIENT_CSV_COLUMNS = ('client_id', 'name', 'fname', 'lname', 'street', 'city', 'state', 'zip')
+
+def parse_client_csv(text):
+    """
+    Turns a client spreadsheet (CSV) into records for repo.import_clients(). Headers are
+    matched case-insensitively; every column whose name starts with 'phone' holds phone
+    numbers (a cell may list several, separated by ';'). Blank cells keep the current value.
+    Each record's 'line' is the CSV line it starts on, so results match the spreadsheet.
+    """
+    rows = csv.reader(io.StringIO(text))
+    # Pair cells with headers by position, so repeated headers (e.g. two 'Phone' columns) all count
+    headers = [h.strip().lower().replace(' ', '_') for h in next(rows, [])]
+    records = []
+    line = rows.line_num
+    for row in rows:
+        # A quoted cell may span several lines; report the first
+        first_line, line = line + 1, rows.line_num
+        record, phones = {}, []
+        for key, value in zip(headers, row):
+            if not value.strip():
+                continue
+            if key in CLIENT_CSV_COLUMNS:
+                record[key] = value
+            elif key.startswith('phone'):
+                phones.append(value)
+        if not record and not phones:
+            continue  # Blank line
+        if phones:
+            record['phones'] = ';'.join(phones)
+        record['line'] = first_line
+        records.append(record)
+    return records
+
+@bp.route("/import_clients", methods=['GET', 'POST'])
+@login_required
+def import_clients():
+    """Bulk client create/update from an uploaded (or pasted) CSV, applied in batches."""
+    if not is_agent():
+        flash('Unauthorized access.', 'danger')
+        return redirect(url_for('main.index'))
+
+    results = summary = None
+    if request.method == 'POST':
+        upload = request.files.get('csv_file')
+        try:
+            text = upload.read().decode('utf-8-sig') if upload and upload.filename else request.form.get('csv_text', '')
+            records = parse_client_csv(text)
+        except (UnicodeDecodeError, csv.Error) as err:
+            flash(f"Could not read the CSV: {err}", "error")
+            records = []
+        else:
+            if not records:
+                flash("No client rows found in the CSV.", "warning")
+
+        if records:
+            results, summary = repo.import_clients(records, replace_phones=bool(request.form.get('replace_phones')))
+            if summary['created'] or summary['updated']:
+                mark_tables_changed('client', 'clientphone')
+            flash(
+                f"Imported {summary['records']} row(s): {summary['created']} created, {summary['updated']} updated, "
+                f"{summary['errors']} failed ({summary['records_per_second']} rows/s).",
+                "success" if not summary['errors'] else "warning"
+            )
+
+    return render_template('import_clients.html', results=results, summary=summary, form=request.form)
+
+@bp.route("/add_property", methods=['GET', 'POST'])
 @login_required
 def add_property():
     if not is_agent():
         flash('Unauthorized access.', 'danger')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
     if request.method == 'POST':
         street = request.form['street']
@@ -711,47 +673,22 @@ def add_property():
         size = request.form['size']
         client_id = request.form['client_id']
         
-        conn = get_db_connection()
-        if not conn:
-            flash("Database connection failed.", "error")
-            return redirect(url_for('agent_dashboard'))
-        cursor = conn.cursor()
-
-        query = "INSERT INTO property (Street, City, State, ZIP, PRICE, TYPE, SIZE, CLIENT_ID, AGENT_ID) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)"
-        cursor.execute(query, (street, city, state, zip_code, price, prop_type, size, client_id, current_user.id))
-        conn.commit()
-
-        cursor.close()
-        conn.close()
+        repo.add_property(street, city, state, zip_code, price, prop_type, size, client_id, current_user.id)
+        mark_tables_changed('property')
 
         flash('Property added successfully!', 'success')
-        return redirect(url_for('agent_dashboard'))
+        return redirect(url_for('main.agent_dashboard'))
 
     # For GET request, we need to fetch clients to populate a dropdown
-    conn = get_db_connection()
-    if not conn:
-        flash("Database connection failed.", "error")
-        return redirect(url_for('agent_dashboard'))
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT CLIENT_ID, Name FROM client")
-    clients = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    
+    clients = repo.list_clients()
     return render_template('add_property.html', clients=clients)
 
-@app.route("/add_contract", methods=['GET', 'POST'])
+@bp.route("/add_contract", methods=['GET', 'POST'])
 @login_required
 def add_contract():
     if not is_agent():
         flash('Unauthorized access.', 'danger')
-        return redirect(url_for('index'))
-    
-    conn = get_db_connection()
-    if not conn:
-        flash("Database connection failed.", "error")
-        return redirect(url_for('agent_dashboard'))
-    cursor = conn.cursor(dictionary=True)
+        return redirect(url_for('main.index'))
 
     if request.method == 'POST':
         client_id = request.form['client_id']
@@ -759,52 +696,149 @@ def add_contract():
         end_date = request.form['end_date']
         amount = request.form['amount']
         
-        query = "INSERT INTO contract (Start_Date, End_Date, Amount, CLIENT_ID, AGENT_ID) VALUES (%s, %s, %s, %s, %s)"
-        cursor.execute(query, (start_date, end_date, amount, client_id, current_user.id))
-        conn.commit()
-
-        cursor.close()
-        conn.close()
+        repo.add_contract(start_date, end_date, amount, client_id, current_user.id)
+        mark_tables_changed('contract')
 
         flash('Contract added successfully!', 'success')
-        return redirect(url_for('agent_dashboard'))
+        return redirect(url_for('main.agent_dashboard'))
 
     # For GET request, we need to fetch clients to populate a dropdown
-    cursor.execute("SELECT CLIENT_ID, Name FROM client")
-    clients = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    
+    clients = repo.list_clients()
     return render_template('add_contract.html', clients=clients)
 
+# --- Startup: Warm-Up, Health Checks and Admin Bootstrap ---
+HOT_TABLES = ('property', 'agent', 'client', 'contract', 'payment')
+
+def warm_up(app):
+    """
+    Gets the app ready for traffic: fills the DB connection pool, loads the table
+    versions used for ETags, compiles every template and renders the admin report
+    fragments into the fragment cache. Safe to call repeatedly;
+    returns True once warm, False if it failed or another warm-up is in progress.
+    """
+    state = app.extensions['startup']
+    if state['ready']:
+        return True
+    if not state['lock'].acquire(blocking=False):
+        return False
+    try:
+        if state['ready']:
+            return True
+        started = time.perf_counter()
+        with app.app_context():
+            repo.warm_up()
+            get_data_version(HOT_TABLES, load_table_versions)
+            for name in app.jinja_env.list_templates():
+                app.jinja_env.get_template(name)
+            for render_fragment in ADMIN_FRAGMENTS:
+                render_fragment()
+        state['warm_up_seconds'] = round(time.perf_counter() - started, 3)
+        state['ready'] = True
+        print(f"Warm-up finished in {state['warm_up_seconds']}s")
+        return True
+    except (ConnectionFailed, RepositoryError) as err:
+        print(f"Warm-up failed: {err}")
+        return False
+    finally:
+        state['lock'].release()
+
+@bp.route('/healthz')
+def healthz():
+    """Liveness: the process is up and serving. Never touches the database."""
+    return jsonify(status='ok')
+
+@bp.route('/readyz')
+def readyz():
+    """Readiness: warmed up and the database answers. The first probe triggers the warm-up."""
+    app = current_app._get_current_object()
+    if not warm_up(app):
+        return jsonify(status='warming up'), 503
+    try:
+        repo.ping()
+    except (ConnectionFailed, RepositoryError) as err:
+        return jsonify(status='database unavailable', error=str(err)), 503
+    return jsonify(status='ready', warm_up_seconds=app.extensions['startup']['warm_up_seconds'])
+
+@bp.cli.command('create-admin')
+@click.option('--email', default='admin@test.com', show_default=True)
+@click.option('--password', default='admin', show_default=True)
+def create_admin_command(email, password):
+    """Creates the admin login, or resets its password if it doesn't match."""
+    try:
+        # Check if admin user exists
+        admin_user = repo.get_user_by_email(email)
+        if admin_user and admin_user['Role'] != 'Admin':
+            raise click.ClickException(f"{email} exists but is not an Admin account.")
+
+        if not admin_user:
+            # Create a default admin user with a hashed password
+            repo.create_user(email, generate_password_hash(password), 'Admin')
+            click.echo(f"Admin user created: {email}")
+        elif not check_password_hash(admin_user['PasswordHash'], password):
+            # Only hash when the password actually needs updating
+            repo.update_password_hash(admin_user['USER_ID'], generate_password_hash(password))
+            click.echo("Admin user password updated.")
+        else:
+            click.echo("Admin user already exists with correct password.")
+    except ConnectionFailed:
+        raise click.ClickException("Could not connect to database to check/create the admin user.")
+
+@bp.cli.command('import-clients')
+@click.argument('csv_file', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--keep-phones', is_flag=True, help="Add the listed phone numbers instead of replacing the current ones.")
+@click.option('--batch-size', default=200, show_default=True, help="Records per transaction.")
+def import_clients_command(csv_file, keep_phones, batch_size):
+    """Creates/updates clients from a CSV file (same columns as the Import Clients page)."""
+    records = parse_client_csv(csv_file.read())
+    try:
+        results, summary = repo.import_clients(records, replace_phones=not keep_phones, batch_size=batch_size)
+    except ConnectionFailed:
+        raise click.ClickException("Could not connect to database.")
+    if summary['created'] or summary['updated']:
+        mark_tables_changed('client', 'clientphone')
+    for result in results:
+        if result['status'] == 'error':
+            click.echo(f"Line {result['row']}: {result['error']}")
+    click.echo(
+        f"{summary['records']} row(s) in {summary['batches']} batch(es): {summary['created']} created, "
+        f"{summary['updated']} updated, {summary['errors']} failed; {summary['phones_added']} phone(s) added, "
+        f"{summary['phones_removed']} removed. {summary['seconds']}s ({summary['records_per_second']} rows/s)"
+    )
+
+@bp.cli.command('expire-contracts')
+@click.option('--days', default=EXPIRY_WINDOW_DAYS, show_default=True, help="Size of the expiry window in days.")
+@click.option('--interval', default=0, show_default=True, help="Re-run every N seconds (0 = run once).")
+@click.option('--quiet', is_flag=True, help="Only print the row counts.")
+def expire_contracts_command(days, interval, quiet):
+    """Refreshes the list of contracts expiring soon (see Repository.scan_expiring_contracts)."""
+    while True:
+        try:
+            counts = repo.scan_expiring_contracts(days)
+        except ConnectionFailed:
+            if interval <= 0:
+                raise click.ClickException("Could not connect to database.")
+            click.echo("Could not connect to database; skipping expiry scan.")
+        else:
+            click.echo(f"Expiry scan ({days} days): {counts}")
+            if not quiet:
+                for agent_id, agent_name, notices in repo.expiring_contracts_by_agent():
+                    click.echo(f"\nAgent {agent_id} - {agent_name}: {len(notices)} contract(s) expiring")
+                    for n in notices:
+                        click.echo(f"  Contract {n['CONTRACT_ID']} ({n['ClientName']}) ends {n['End_Date']}")
+        if interval <= 0:
+            break
+        time.sleep(interval)
+
+@bp.cli.command('warm-up')
+def warm_up_command():
+    """Runs the warm-up once and reports how long it took (useful as a smoke test)."""
+    app = current_app._get_current_object()
+    if not warm_up(app):
+        raise click.ClickException("Warm-up failed.")
+    click.echo(f"Warm-up took {app.extensions['startup']['warm_up_seconds']}s")
+
 # --- Run the App ---
+# Development only. In production use a WSGI server, e.g.:
+#   gunicorn -w 4 'app:create_app()'
 if __name__ == '__main__':
-    with app.app_context():
-        conn = get_db_connection()
-        if conn:
-            cursor = conn.cursor(dictionary=True)
-            # Check if admin user exists
-            cursor.execute("SELECT * FROM user WHERE Email = 'admin@test.com' AND Role = 'Admin'")
-            admin_user = cursor.fetchone()
-
-            hashed_password = generate_password_hash('admin')
-
-            if not admin_user:
-                # Create a default admin user with a hashed password
-                cursor.execute("INSERT INTO user (Email, PasswordHash, Role) VALUES (%s, %s, %s)", ('admin@test.com', hashed_password, 'Admin'))
-                conn.commit()
-                print("Default admin user created: admin@test.com / admin")
-            else:
-                # If user exists, check if password needs updating
-                if not check_password_hash(admin_user['PasswordHash'], 'admin'):
-                    cursor.execute("UPDATE user SET PasswordHash = %s WHERE USER_ID = %s", (hashed_password, admin_user['USER_ID']))
-                    conn.commit()
-                    print("Admin user password updated.")
-                else:
-                    print("Admin user already exists with correct password.")
-            
-            cursor.close()
-            conn.close()
-        else:
-            print("Could not connect to database to check/create default admin user.")
-    app.run(debug=True)
\ No newline at end of file
+    create_app().run(debug=True)
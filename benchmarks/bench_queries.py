@@ -0,0 +1,200 @@
+"""
+Query-path benchmark. Runs entirely in-process on the SQLite backend, so no
+MySQL server is needed:
+
+    python benchmarks/bench_queries.py --clients 2000 --repeat 50
+
+Times each repository method directly, the bulk client import, then the full
+pages (query + template + caching) through Flask's test client.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DB_BACKEND', 'sqlite')
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from repository import create_repository  # noqa: E402
+
+
+def seed(repo, clients, agents, properties_per_client=2, payments_per_contract=3, rng=None):
+    """Fills an empty repository with synthetic data. Returns a dict of a few useful IDs."""
+    rng = rng or random.Random(42)
+    today = date.today()
+    conn = repo.connect()
+    cursor = conn.cursor()
+    p = repo.backend.prepare
+
+    cursor.execute(p("INSERT INTO office (Name, City) VALUES (%s, %s)"), ('Downtown Realty', 'New York'))
+    office_id = cursor.lastrowid
+
+    cursor.executemany(
+        p("INSERT INTO agent (Name, CommissionPerc, OFFICE_ID) VALUES (%s, %s, %s)"),
+        [(f"Agent {i}", Decimal('5.00'), office_id) for i in range(agents)]
+    )
+    cursor.executemany(
+        p("INSERT INTO client (Name, City) VALUES (%s, %s)"),
+        [(f"Client {i}", 'New York') for i in range(clients)]
+    )
+    cursor.execute("SELECT AGENT_ID FROM agent")
+    agent_ids = [row['AGENT_ID'] for row in cursor.fetchall()]
+    cursor.execute("SELECT CLIENT_ID FROM client")
+    client_ids = [row['CLIENT_ID'] for row in cursor.fetchall()]
+
+    cursor.executemany(
+        p("INSERT INTO property (Street, City, PRICE, CLIENT_ID, AGENT_ID) VALUES (%s, %s, %s, %s, %s)"),
+        [
+            (f"{rng.randint(1, 999)} Main St", 'New York', Decimal(rng.randint(100, 2000) * 1000), client_id, rng.choice(agent_ids))
+            for client_id in client_ids for _ in range(properties_per_client)
+        ]
+    )
+    cursor.executemany(
+        p("INSERT INTO contract (Start_Date, End_Date, Amount, CLIENT_ID, AGENT_ID) VALUES (%s, %s, %s, %s, %s)"),
+        [
+            (today - timedelta(days=180), today + timedelta(days=rng.randint(-90, 365)),
+             Decimal(rng.randint(100, 2000) * 1000), client_id, rng.choice(agent_ids))
+            for client_id in client_ids
+        ]
+    )
+    cursor.execute("SELECT CONTRACT_ID FROM contract")
+    contract_ids = [row['CONTRACT_ID'] for row in cursor.fetchall()]
+    cursor.executemany(
+        p("INSERT INTO payment (Payment_Date, Amount, CONTRACT_ID) VALUES (%s, %s, %s)"),
+        [
+            (today - timedelta(days=rng.randint(0, 180)), Decimal(rng.randint(1, 50) * 1000), contract_id)
+            for contract_id in contract_ids for _ in range(payments_per_contract)
+        ]
+    )
+
+    # One login of each role; cheap hashes keep seeding fast
+    logins = {}
+    for email, role, agent_id, client_id in [
+        ('admin@test.com', 'Admin', None, None),
+        ('agent@test.com', 'Agent', agent_ids[0], None),
+        ('client@test.com', 'Client', None, client_ids[0]),
+    ]:
+        cursor.execute(
+            p("INSERT INTO user (Email, PasswordHash, Role, AGENT_ID, CLIENT_ID) VALUES (%s, %s, %s, %s, %s)"),
+            (email, generate_password_hash(role.lower(), method='pbkdf2:sha256:1000'), role, agent_id, client_id)
+        )
+        logins[role] = cursor.lastrowid
+
+    conn.commit()
+    cursor.close()
+    conn.close()
+    return {'agent_id': agent_ids[0], 'client_id': client_ids[0], 'logins': logins}
+
+
+def timeit(fn, repeat):
+    """Returns (mean_ms, p95_ms) over `repeat` calls."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return sum(samples) / len(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def report(name, mean_ms, p95_ms):
+    print(f"  {name:<40} mean {mean_ms:8.3f} ms   p95 {p95_ms:8.3f} ms")
+
+
+def bench_repository(repo, ids, repeat):
+    print("Repository methods:")
+    cases = {
+        'admin_stats': repo.admin_stats,
+        'properties_page': repo.properties_page,
+        'high_value_clients': repo.high_value_clients,
+        'list_payments': repo.list_payments,
+        'client_payments': lambda: repo.client_payments(ids['client_id']),
+        'client_properties': lambda: repo.client_properties(ids['client_id']),
+        'agent_earnings': lambda: repo.agent_earnings(ids['agent_id']),
+        'agent_total_sales': lambda: repo.agent_total_sales(ids['agent_id']),
+    }
+    for name, fn in cases.items():
+        report(name, *timeit(fn, repeat))
+
+
+def bench_import(repo, records):
+    """Throughput of the bulk client import vs saving the same clients one form at a time."""
+    print(f"Client import ({records} records, 2 phones each):")
+    client_ids = [row['CLIENT_ID'] for row in repo.list_clients()][:records]
+
+    start = time.perf_counter()
+    for client_id in client_ids:
+        repo.update_client_profile(client_id, 'First', 'Last', '1 Main St', 'Boston', 'MA', '02101', f"555-{client_id}-1; 555-{client_id}-2")
+    elapsed = time.perf_counter() - start
+    print(f"  {'update_client_profile (one by one)':<40} {len(client_ids) / elapsed:10.1f} records/s")
+
+    rows = [
+        {'client_id': client_id, 'fname': 'Bulk', 'city': 'Chicago', 'phones': [f"555-{client_id}-1", f"555-{client_id}-3"]}
+        for client_id in client_ids
+    ]
+    _, summary = repo.import_clients(rows)
+    print(f"  {'import_clients (batched)':<40} {summary['records_per_second']:10.1f} records/s"
+          f"   ({summary['batches']} batches, {summary['errors']} errors)")
+
+
+def bench_pages(repo, ids, repeat):
+    import app as app_module
+    from cache import fragment_cache
+
+    # Benchmarks deliberately hammer routes; don't let admission control skew the numbers
+    app = app_module.create_app({'REPOSITORY': repo, 'TESTING': True, 'ADMISSION_ENABLED': False})
+
+    print("Pages (test client):")
+    for role, paths in [
+        ('Admin', ['/admin_dashboard', '/properties', '/payments', '/high_value_clients']),
+        ('Client', ['/client_dashboard']),
+        ('Agent', ['/agent_dashboard']),
+    ]:
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(ids['logins'][role])
+            session['_fresh'] = True
+        for path in paths:
+            def cold():
+                fragment_cache.clear()
+                assert client.get(path).status_code == 200
+
+            report(f"{path} (cold)", *timeit(cold, repeat))
+            response = client.get(path)
+            report(f"{path} (warm)", *timeit(lambda: client.get(path), repeat))
+            etag = response.headers.get('ETag')
+            if etag:
+                report(f"{path} (304 revalidation)", *timeit(
+                    lambda: client.get(path, headers={'If-None-Match': etag}), repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the app's query paths on in-memory SQLite.")
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--agents', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--skip-pages', action='store_true', help="Only time the repository methods")
+    parser.add_argument('--import-records', type=int, default=500, help="Clients to update in the import benchmark (0 = skip)")
+    args = parser.parse_args()
+
+    repo = create_repository('sqlite')
+    start = time.perf_counter()
+    ids = seed(repo, args.clients, args.agents)
+    print(f"Seeded {args.clients} clients / {args.agents} agents in {time.perf_counter() - start:.2f}s\n")
+
+    bench_repository(repo, ids, args.repeat)
+    if args.import_records:
+        print()
+        bench_import(repo, args.import_records)
+    if not args.skip_pages:
+        print()
+        bench_pages(repo, ids, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Startup benchmark. Each scenario runs in a fresh interpreter so imports, template
+compilation and connection setup are really cold. Uses the SQLite backend, so no
+MySQL server is needed:
+
+    python benchmarks/bench_startup.py --clients 2000 --runs 5
+
+Reports the time to import the app, build it with create_app(), answer the first
+/healthz, run warm_up(), and serve the first /properties with and without a
+warm-up beforehand.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIO = """
+import json, os, sys, time
+sys.path.insert(0, {root!r})
+sys.path.insert(0, os.path.join({root!r}, 'benchmarks'))
+os.environ['DB_BACKEND'] = 'sqlite'
+timings = {{}}
+
+start = time.perf_counter()
+import app as app_module
+timings['import'] = time.perf_counter() - start
+
+start = time.perf_counter()
+app = app_module.create_app({{'TESTING': True, 'ADMISSION_ENABLED': False}})
+timings['create_app'] = time.perf_counter() - start
+
+client = app.test_client()
+start = time.perf_counter()
+assert client.get('/healthz').status_code == 200
+timings['first_healthz'] = time.perf_counter() - start
+
+# Seeding is setup, not startup: keep it out of the numbers
+from bench_queries import seed
+with app.app_context():
+    ids = seed(app_module.repo, {clients}, {agents})
+
+if {warm}:
+    start = time.perf_counter()
+    assert app_module.warm_up(app)
+    timings['warm_up'] = time.perf_counter() - start
+
+with client.session_transaction() as session:
+    session['_user_id'] = str(ids['logins']['Admin'])
+    session['_fresh'] = True
+start = time.perf_counter()
+assert client.get('/properties').status_code == 200
+timings['first_properties'] = time.perf_counter() - start
+
+print(json.dumps(timings))
+"""
+
+
+def run_scenario(warm, clients, agents):
+    code = SCENARIO.format(root=ROOT, clients=clients, agents=agents, warm=warm)
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark app startup and first-request latency on SQLite.")
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--agents', type=int, default=50)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    for warm in (False, True):
+        runs = [run_scenario(warm, args.clients, args.agents) for _ in range(args.runs)]
+        print("With warm-up:" if warm else "Without warm-up:")
+        for name in runs[0]:
+            samples = sorted(run[name] * 1000 for run in runs)
+            print(f"  {name:<20} median {samples[len(samples) // 2]:8.2f} ms   max {samples[-1]:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
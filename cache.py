@@ -0,0 +1,203 @@
+import glob
+import gzip
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, request, session, make_response
+from flask_login import current_user
+from markupsafe import Markup
+
+# --- Cache Configuration ---
+# How often (in seconds) the shared `table_version` rows are re-read.
+# Between refreshes, ETag checks are answered purely from memory.
+VERSION_REFRESH_SECONDS = 2.0
+FRAGMENT_CACHE_SIZE = 256        # Max number of rendered table bodies kept in memory
+COMPRESS_MIN_SIZE = 2048         # Don't bother gzipping small pages
+COMPRESS_LEVEL = 6
+
+# --- Per-Table Change Versions ---
+# A table's version is its row in `table_version`, bumped by the app after each
+# write commits (see bump_table_version). Every worker reads the same rows, so
+# they all hand out the same ETags. The local counter only moves when that
+# bump fails (e.g. an older database without the table), so this process at
+# least stops serving its own stale pages.
+_lock = threading.Lock()
+_local_versions = {}
+_db_versions = {}
+_db_versions_loaded_at = 0.0
+
+
+def bump_table_version(save_versions, *tables):
+    """
+    Marks the given tables as changed. Call after the write has committed:
+    `save_versions(tables)` bumps the shared counters in a short transaction of
+    its own, and this process re-reads them on its next check.
+    """
+    global _db_versions_loaded_at
+    try:
+        save_versions(tables)
+    except Exception as err:
+        print(f"Could not bump table versions: {err}")
+        with _lock:
+            for table in tables:
+                _local_versions[table] = _local_versions.get(table, 0) + 1
+    with _lock:
+        _db_versions_loaded_at = 0.0
+
+
+def source_fingerprint(root, patterns=('*.py', 'repository/*.py', 'templates/**/*.html')):
+    """
+    A short hash of the app's code and templates, used as the build token in ETags
+    so a deploy that changes the markup invalidates pages browsers already hold.
+    It depends only on file contents, so every worker of a deploy gets the same one.
+    """
+    digest = hashlib.sha1()
+    for pattern in patterns:
+        for path in sorted(glob.glob(os.path.join(root, pattern), recursive=True)):
+            digest.update(os.path.relpath(path, root).encode('utf-8'))
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def _refresh_db_versions(load_versions):
+    global _db_versions, _db_versions_loaded_at
+    now = time.monotonic()
+    if now - _db_versions_loaded_at < VERSION_REFRESH_SECONDS:
+        return
+    _db_versions_loaded_at = now
+
+    try:
+        _db_versions = load_versions()
+    except Exception as err:
+        # Older databases may not have the table_version table yet; fall back to local counters
+        print(f"Could not read table versions: {err}")
+
+
+def get_data_version(tables, load_versions):
+    """
+    Returns a string that changes whenever any of the given tables change.
+    `load_versions` returns the DB counters as {table: version}.
+    """
+    _refresh_db_versions(load_versions)
+    with _lock:
+        return ";".join(
+            f"{table}:{_db_versions.get(table, 0)}.{_local_versions.get(table, 0)}"
+            for table in sorted(tables)
+        )
+
+
+def _viewer_key():
+    if current_user.is_authenticated:
+        return f"{current_user.role}:{current_user.id}"
+    return "anonymous"
+
+
+# --- ETag / Conditional GET ---
+def etag_cached(load_versions, *tables):
+    """
+    Decorator for read-only pages. Builds a weak ETag from the build token
+    (BUILD_ID), the route, the viewer (role + ID) and the versions of `tables`,
+    and answers a matching If-None-Match with 304 before the view runs any queries.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+
+            version = get_data_version(tables, load_versions)
+            raw = f"{current_app.config.get('BUILD_ID', '')}|{request.full_path}|{_viewer_key()}|{version}"
+            etag = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+            # Pending flash messages are rendered into the page, so it must be rebuilt
+            has_flashes = bool(session.get('_flashes'))
+            if not has_flashes and request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
+
+
+# --- Rendered Fragment Cache ---
+class FragmentCache:
+    """A small thread-safe LRU of rendered HTML fragments."""
+
+    def __init__(self, max_size=FRAGMENT_CACHE_SIZE):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            html = self._items.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return html
+
+    def set(self, key, html):
+        with self._lock:
+            self._items[key] = html
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+fragment_cache = FragmentCache()
+
+
+def cached_fragment(name, tables, load_versions, render, per_user=True):
+    """
+    Returns the rendered fragment `name`, keyed by the data version of `tables`
+    and (optionally) the viewer. `render` is only called on a miss, so it can run
+    the queries needed to build the fragment. Returns None if `render` does.
+    """
+    key = (name, get_data_version(tables, load_versions), _viewer_key() if per_user else None)
+    html = fragment_cache.get(key)
+    if html is None:
+        html = render()
+        if html is None:
+            # The render step couldn't get its data (e.g. no DB connection); don't cache that
+            return None
+        html = Markup(html)
+        fragment_cache.set(key, html)
+    return html
+
+
+# --- Response Compression ---
+def compress_response(response):
+    """after_request hook: gzip large HTML responses when the client accepts it."""
+    response.vary.add('Accept-Encoding')
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or response.mimetype != 'text/html'
+            or 'Content-Encoding' in response.headers
+            or 'gzip' not in request.headers.get('Accept-Encoding', '').lower()):
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+
+    response.set_data(gzip.compress(data, compresslevel=COMPRESS_LEVEL))
+    response.headers['Content-Encoding'] = 'gzip'
+    return response
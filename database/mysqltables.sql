@@ -183,6 +183,26 @@ BEGIN
 END$$
 DELIMITER ;
 
+-- -----------------------------------------------------
+-- 3b. Change-Version Tracking (used for HTTP caching)
+-- -----------------------------------------------------
+
+-- One row per table; the app bumps Version after each write commits, in a short
+-- transaction of its own (no per-row triggers, so writers never queue on these rows
+-- for the length of their transaction). The app folds these into ETags and
+-- fragment-cache keys.
+CREATE TABLE IF NOT EXISTS `table_version` (
+  `Table_Name` VARCHAR(64) NOT NULL,
+  `Version` BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (`Table_Name`)
+);
+
+-- A row for every table the app marks as changed; bumping a table without one is a no-op
+INSERT INTO `table_version` (Table_Name, Version)
+VALUES ('user', 0), ('client', 0), ('clientphone', 0), ('agent', 0), ('property', 0),
+       ('contract', 0), ('payment', 0), ('commission', 0), ('earns', 0)
+ON DUPLICATE KEY UPDATE Version=Version;
+
 -- -----------------------------------------------------
 -- 4. PROJECT REQUIREMENT: Stored Procedure
 -- -----------------------------------------------------
@@ -249,6 +269,62 @@ BEGIN
 END$$
 DELIMITER ;
 
+-- -----------------------------------------------------
+-- 5b. Contract Expiry Scanner (see `flask expire-contracts`)
+-- -----------------------------------------------------
+
+-- Range scans on End_Date (and change detection via Updated_At) need indexes,
+-- otherwise every scan is a full table scan of contract.
+ALTER TABLE `contract`
+  ADD COLUMN `Updated_At` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  ADD INDEX `idx_contract_end_date` (`End_Date`),
+  ADD INDEX `idx_contract_updated_at` (`Updated_At`);
+
+-- One row per contract that ends inside the scanner's current window
+CREATE TABLE IF NOT EXISTS `contract_expiry_notice` (
+  `CONTRACT_ID` INT NOT NULL,
+  `AGENT_ID` INT NOT NULL,
+  `CLIENT_ID` INT NOT NULL,
+  `End_Date` DATE NOT NULL,
+  `Amount` DECIMAL(12, 2) NULL,
+  `Noticed_At` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`CONTRACT_ID`),
+  INDEX `idx_notice_agent_end` (`AGENT_ID`, `End_Date`),
+  INDEX `idx_notice_end_date` (`End_Date`),
+  FOREIGN KEY (`CONTRACT_ID`) REFERENCES `contract` (`CONTRACT_ID`) ON DELETE CASCADE
+);
+
+-- Remembers where the last scan stopped so the next one only looks at what changed
+CREATE TABLE IF NOT EXISTS `expiry_scan_state` (
+  `Scan_Name` VARCHAR(50) NOT NULL,
+  `Window_Days` INT NOT NULL,
+  `Window_End` DATE NOT NULL,
+  `Last_Run` DATETIME NOT NULL,
+  PRIMARY KEY (`Scan_Name`)
+);
+
+-- -----------------------------------------------------
+-- 5c. Backfill Profile Links
+-- -----------------------------------------------------
+
+-- Signup used to create the client/agent row (with the same ID as the login)
+-- without setting user.CLIENT_ID / user.AGENT_ID. Link those rows now, skipping
+-- any that another login already claims. The grouped derived table is
+-- materialized, which lets MySQL read `user` while updating it.
+UPDATE `user` u
+JOIN `client` c ON c.CLIENT_ID = u.USER_ID
+LEFT JOIN (SELECT CLIENT_ID FROM `user` WHERE CLIENT_ID IS NOT NULL GROUP BY CLIENT_ID) linked
+  ON linked.CLIENT_ID = u.USER_ID
+SET u.CLIENT_ID = u.USER_ID
+WHERE u.Role = 'Client' AND u.CLIENT_ID IS NULL AND linked.CLIENT_ID IS NULL;
+
+UPDATE `user` u
+JOIN `agent` a ON a.AGENT_ID = u.USER_ID
+LEFT JOIN (SELECT AGENT_ID FROM `user` WHERE AGENT_ID IS NOT NULL GROUP BY AGENT_ID) linked
+  ON linked.AGENT_ID = u.USER_ID
+SET u.AGENT_ID = u.USER_ID
+WHERE u.Role = 'Agent' AND u.AGENT_ID IS NULL AND linked.AGENT_ID IS NULL;
+
 -- -----------------------------------------------------
 -- 6. DATA SEEDING (Test Data)
 -- -----------------------------------------------------
@@ -0,0 +1,27 @@
+from repository.backends import ConnectionFailed, MySQLBackend, SQLiteBackend
+from repository.repository import RemovalIncomplete, Repository, RepositoryError
+
+
+def create_repository(backend='mysql', **options):
+    """
+    Builds a Repository on the named backend.
+      create_repository('mysql', config=db_config, pool_size=5, pool_timeout=5.0)
+      create_repository('sqlite')                      # private in-memory DB
+      create_repository('sqlite', database='dev.db')
+    """
+    if backend == 'mysql':
+        return Repository(MySQLBackend(options['config'], options.get('pool_size', 0), options.get('pool_timeout', 5.0)))
+    if backend == 'sqlite':
+        return Repository(SQLiteBackend(options.get('database', ':memory:')))
+    raise ValueError(f"Unknown database backend: {backend}")
+
+
+__all__ = [
+    'ConnectionFailed',
+    'MySQLBackend',
+    'RemovalIncomplete',
+    'SQLiteBackend',
+    'Repository',
+    'RepositoryError',
+    'create_repository',
+]
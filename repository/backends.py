@@ -0,0 +1,237 @@
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+SQLITE_SCHEMA_PATH = os.path.join(os.path.dirname(__file__), 'sqlite_schema.sql')
+POOL_RETRY_SECONDS = 0.05  # How often connect() re-checks an exhausted pool
+
+
+class ConnectionFailed(Exception):
+    """The backend could not open a database connection."""
+
+
+# --- MySQL Backend ---
+class MySQLBackend:
+    """The production backend. Uses the stored procedure/function from mysqltables.sql."""
+    name = 'mysql'
+    supports_db_logins = True
+
+    def __init__(self, config, pool_size=0, pool_timeout=5.0):
+        import mysql.connector  # Only needed when this backend is actually used
+        self._connector = mysql.connector
+        self.config = dict(config)
+        self.errors = (mysql.connector.Error,)
+        # The pool is opened on first use (or by warm_up()), not at construction,
+        # so building the app never waits on MySQL
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    from mysql.connector import pooling
+                    self._pool = pooling.MySQLConnectionPool(
+                        pool_name='real_estate_pool', pool_size=self.pool_size, **self.config
+                    )
+        return self._pool
+
+    def connect(self):
+        try:
+            if not self.pool_size:
+                return self._connector.connect(**self.config)
+            # The pool caps connections per worker: when it's exhausted, wait up to
+            # pool_timeout for one to come back rather than opening more
+            pool = self._get_pool()
+            deadline = time.monotonic() + self.pool_timeout
+            while True:
+                try:
+                    return pool.get_connection()
+                except self._connector.errors.PoolError as err:
+                    if time.monotonic() >= deadline:
+                        raise ConnectionFailed(f"No pooled connection free after {self.pool_timeout}s: {err}") from err
+                    time.sleep(POOL_RETRY_SECONDS)
+        except self._connector.Error as err:
+            raise ConnectionFailed(str(err)) from err
+
+    def warm_up(self):
+        """Opens every pooled connection up front."""
+        if self.pool_size:
+            try:
+                self._get_pool()
+            except self._connector.Error as err:
+                raise ConnectionFailed(str(err)) from err
+
+    def cursor(self, conn):
+        return conn.cursor(dictionary=True, buffered=True)
+
+    def prepare(self, sql):
+        return sql
+
+    lock_rows_clause = " FOR UPDATE"
+
+    def current_date_and_time(self, cursor):
+        """(today, now) by the database clock, the one TIMESTAMP defaults are stamped with."""
+        cursor.execute("SELECT CURDATE() AS today, NOW() AS now")
+        row = cursor.fetchone()
+        return row['today'], row['now']
+
+    def bulk_update_sql(self, table, key_column, columns, rows):
+        """A multi-row UPDATE of existing rows; params are each row's key then `columns`, row by row."""
+        first = "SELECT " + ", ".join(f"%s AS {c}" for c in [key_column, *columns])
+        values = " UNION ALL ".join([first] + ["SELECT " + ", ".join(["%s"] * (len(columns) + 1))] * (rows - 1))
+        return (
+            f"UPDATE {table} t JOIN ({values}) v ON v.{key_column} = t.{key_column} "
+            "SET " + ", ".join(f"t.{c} = v.{c}" for c in columns)
+        )
+
+    def upsert_clause(self, key_columns, update_columns):
+        """Tail of a multi-row INSERT that updates `update_columns` on a key clash (or ignores it)."""
+        if not update_columns:
+            return f"ON DUPLICATE KEY UPDATE {key_columns[0]} = {key_columns[0]}"
+        return "ON DUPLICATE KEY UPDATE " + ", ".join(f"{c} = VALUES({c})" for c in update_columns)
+
+    def agent_total_sales(self, cursor, agent_id):
+        cursor.execute("SELECT fn_GetAgentTotalSales(%s) AS sales", (agent_id,))
+        result = cursor.fetchone()
+        return result['sales'] if result else None
+
+    def generate_commission(self, cursor, payment_no):
+        cursor.callproc('sp_GenerateCommission', (payment_no,))
+
+    def create_db_login(self, cursor, name, password, role):
+        """Creates a MySQL account for the app user with privileges matching their role."""
+        cursor.execute(f"CREATE USER '{name}'@'localhost' IDENTIFIED BY '{password}'")
+        if role == 'Client':
+            cursor.execute(f"GRANT SELECT ON real_estate_db.* TO '{name}'@'localhost'")
+        elif role == 'Agent':
+            cursor.execute(f"GRANT SELECT, INSERT, UPDATE ON real_estate_db.property TO '{name}'@'localhost'")
+            cursor.execute(f"GRANT SELECT, INSERT, UPDATE ON real_estate_db.client TO '{name}'@'localhost'")
+            cursor.execute(f"GRANT SELECT, INSERT, UPDATE ON real_estate_db.contract TO '{name}'@'localhost'")
+
+
+# --- SQLite Backend ---
+# Store dates/decimals as text and read them back as the same Python types
+# mysql.connector returns, so templates and callers can't tell the difference.
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_adapter(date, lambda d: d.isoformat())
+sqlite3.register_adapter(datetime, lambda d: d.isoformat(' '))
+sqlite3.register_converter('DECIMAL', lambda b: Decimal(b.decode()))
+sqlite3.register_converter('DATE', lambda b: date.fromisoformat(b.decode()[:10]))
+sqlite3.register_converter('DATETIME', lambda b: datetime.fromisoformat(b.decode()))
+sqlite3.register_converter('TIMESTAMP', lambda b: datetime.fromisoformat(b.decode()))
+
+_memory_db_ids = itertools.count(1)
+
+
+def _dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLiteBackend:
+    """
+    An in-process backend for tests, benchmarks and profiling. The schema is a
+    translation of mysqltables.sql; the procedure and function are reimplemented below.
+    Pass database=':memory:' (the default) for a private, hermetic database.
+    """
+    name = 'sqlite'
+    supports_db_logins = False  # No per-user database logins, so no create_db_login()
+
+    def __init__(self, database=':memory:'):
+        self.errors = (sqlite3.Error,)
+        if database == ':memory:':
+            # A named shared-cache DB, so every connect() sees the same data.
+            # The anchor connection keeps it alive for the lifetime of the backend.
+            self.database = f"file:realestate_mem_{next(_memory_db_ids)}?mode=memory&cache=shared"
+            self._uri = True
+        else:
+            self.database = database
+            self._uri = False
+        self._anchor = self.connect()
+        with open(SQLITE_SCHEMA_PATH) as f:
+            self._anchor.executescript(f.read())
+        self._anchor.commit()
+
+    def connect(self):
+        try:
+            conn = sqlite3.connect(
+                self.database,
+                uri=self._uri,
+                detect_types=sqlite3.PARSE_DECLTYPES,
+                check_same_thread=False,
+            )
+        except sqlite3.Error as err:
+            raise ConnectionFailed(str(err)) from err
+        conn.row_factory = _dict_row
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    def cursor(self, conn):
+        return conn.cursor()
+
+    def warm_up(self):
+        pass  # Nothing to pre-open; the schema is created in __init__
+
+    def prepare(self, sql):
+        return sql.replace('%s', '?')
+
+    lock_rows_clause = ""  # SQLite serializes writers on the whole database
+
+    def current_date_and_time(self, cursor):
+        # CURRENT_TIMESTAMP defaults are UTC in SQLite, so read the clock in UTC too
+        cursor.execute("SELECT date('now') AS today, datetime('now') AS now")
+        row = cursor.fetchone()
+        return date.fromisoformat(row['today']), datetime.fromisoformat(row['now'])
+
+    def bulk_update_sql(self, table, key_column, columns, rows):
+        # UPDATE ... FROM needs SQLite 3.33+; VALUES columns are named column1, column2, ...
+        names = ", ".join(f"column{i + 1} AS {c}" for i, c in enumerate([key_column, *columns]))
+        values = ", ".join([f"({', '.join(['%s'] * (len(columns) + 1))})"] * rows)
+        return (
+            f"UPDATE {table} SET " + ", ".join(f"{c} = v.{c}" for c in columns)
+            + f" FROM (SELECT {names} FROM (VALUES {values})) AS v WHERE {table}.{key_column} = v.{key_column}"
+        )
+
+    def upsert_clause(self, key_columns, update_columns):
+        conflict = f"ON CONFLICT ({', '.join(key_columns)})"
+        if not update_columns:
+            return f"{conflict} DO NOTHING"
+        return f"{conflict} DO UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in update_columns)
+
+    def agent_total_sales(self, cursor, agent_id):
+        # fn_GetAgentTotalSales
+        cursor.execute("SELECT IFNULL(SUM(Amount), 0) AS sales FROM contract WHERE AGENT_ID = ?", (agent_id,))
+        return Decimal(str(cursor.fetchone()['sales']))
+
+    def generate_commission(self, cursor, payment_no):
+        # sp_GenerateCommission
+        cursor.execute("""
+            SELECT p.Amount, c.AGENT_ID, a.CommissionPerc
+            FROM payment p
+            JOIN contract c ON p.CONTRACT_ID = c.CONTRACT_ID
+            JOIN agent a ON c.AGENT_ID = a.AGENT_ID
+            WHERE p.Payment_No = ?
+        """, (payment_no,))
+        row = cursor.fetchone()
+        if not row:
+            return
+        amount = None
+        if row['Amount'] is not None and row['CommissionPerc'] is not None:
+            amount = (row['Amount'] * (row['CommissionPerc'] / 100)).quantize(Decimal('0.01'))
+        cursor.execute(
+            "INSERT INTO commission (Amount, CommissionPerc) VALUES (?, ?)",
+            (amount, row['CommissionPerc'])
+        )
+        cursor.execute(
+            "INSERT INTO earns (Earned_Date, AGENT_ID, COMMISSION_ID) VALUES (?, ?, ?)",
+            (date.today(), row['AGENT_ID'], cursor.lastrowid)
+        )
+
+    def close(self):
+        self._anchor.close()
@@ -0,0 +1,896 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import groupby
+
+# Bulk account removal: accounts per transaction, and IDs per IN (...) list
+REMOVAL_BATCH_SIZE = 50
+REMOVAL_CHUNK_SIZE = 500
+
+# Bulk client import: records per transaction, and rows per multi-row INSERT
+IMPORT_BATCH_SIZE = 200
+IMPORT_ROWS_PER_STATEMENT = 500
+
+# Import record key -> (client column, max length)
+CLIENT_IMPORT_FIELDS = {
+    'name': ('Name', 100),
+    'fname': ('Fname', 50),
+    'lname': ('Lname', 50),
+    'street': ('AddressStreet', 100),
+    'city': ('City', 50),
+    'state': ('State', 50),
+    'zip': ('ZIPCode', 10),
+}
+CLIENT_COLUMNS = [column for column, _ in CLIENT_IMPORT_FIELDS.values()]
+PHONE_MAX_LENGTH = 45
+
+# Contract expiry scanner: see scan_expiring_contracts()
+EXPIRY_SCAN_NAME = 'contract_expiry'
+EXPIRY_WINDOW_DAYS = 30
+CHANGE_MARGIN_SECONDS = 3600  # Longer than any write transaction on `contract` should run
+NOTICE_COLUMNS = ['AGENT_ID', 'CLIENT_ID', 'End_Date', 'Amount']
+
+
+class RepositoryError(Exception):
+    """A query failed. Wraps the backend's own exception type."""
+
+
+class RemovalIncomplete(RepositoryError):
+    """A remove_accounts() batch failed. Earlier batches stay committed; `counts` covers them."""
+
+    def __init__(self, message, counts):
+        super().__init__(message)
+        self.counts = counts
+
+
+def _chunks(ids, size):
+    ids = sorted(ids)
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+def _placeholders(n):
+    return ', '.join(['%s'] * n)
+
+
+def _values_rows(rows, columns):
+    """`(%s, %s), (%s, %s), ...` for a multi-row VALUES list."""
+    return ', '.join([f"({_placeholders(columns)})"] * rows)
+
+
+def _slices(rows, size):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def _normalize_phones(phones):
+    """Trims and de-duplicates phone numbers; a string may hold several separated by ';' or ','."""
+    if phones is None:
+        return []
+    if isinstance(phones, str):
+        phones = re.split(r'[;,]', phones)
+    normalized = []
+    for phone in phones:
+        phone = ' '.join(str(phone).split())
+        if phone and phone not in normalized:
+            normalized.append(phone)
+    return normalized
+
+
+def _parse_import_record(record):
+    """Validates one import record. Returns (client_id or None, {column: value}, phones or None)."""
+    client_id = record.get('client_id')
+    if client_id in (None, ''):
+        client_id = None
+    else:
+        try:
+            client_id = int(client_id)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid client ID: {client_id!r}")
+
+    values = {}
+    for key, (column, max_length) in CLIENT_IMPORT_FIELDS.items():
+        if record.get(key) is None:
+            continue  # Left out: keep the current value
+        value = str(record[key]).strip()
+        if len(value) > max_length:
+            raise ValueError(f"{key} is longer than {max_length} characters")
+        values[column] = value
+    if not values.get('Name'):
+        values.pop('Name', None)  # Name is required, so a blank one never overwrites
+
+    phones = None
+    if 'phones' in record:
+        phones = _normalize_phones(record['phones'])
+        too_long = [p for p in phones if len(p) > PHONE_MAX_LENGTH]
+        if too_long:
+            raise ValueError(f"Phone number longer than {PHONE_MAX_LENGTH} characters: {too_long[0]}")
+
+    if client_id is None and 'Name' not in values:
+        name = ' '.join(filter(None, [values.get('Fname'), values.get('Lname')]))
+        if not name:
+            raise ValueError("A new client needs a name (or a first/last name)")
+        values['Name'] = name[:CLIENT_IMPORT_FIELDS['name'][1]]
+    return client_id, values, phones
+
+
+class _Cursor:
+    """Cursor wrapper that translates `%s` placeholders for the active backend."""
+
+    def __init__(self, backend, cursor):
+        self._backend = backend
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(self._backend.prepare(sql), params)
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(self._backend.prepare(sql), seq_of_params)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+
+class Repository:
+    """
+    All of the app's SQL, behind typed methods. Each method opens its own
+    connection and, for writes, commits (or rolls back) before returning.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    # --- Connection Helpers ---
+    def connect(self):
+        """Returns a raw backend connection (raises ConnectionFailed)."""
+        return self.backend.connect()
+
+    def warm_up(self):
+        """Pre-opens the backend's connections (e.g. fills the MySQL pool)."""
+        self.backend.warm_up()
+
+    def ping(self):
+        """Round-trips a trivial query; raises ConnectionFailed/RepositoryError if the DB is down."""
+        with self._cursor() as cursor:
+            cursor.execute("SELECT 1 AS ok")
+            return cursor.fetchone()['ok'] == 1
+
+    def table_versions(self):
+        """{table: version} from the `table_version` change counters (see cache.py)."""
+        with self._cursor() as cursor:
+            cursor.execute("SELECT Table_Name, Version FROM table_version")
+            return {row['Table_Name']: row['Version'] for row in cursor.fetchall()}
+
+    def bump_table_versions(self, tables):
+        """
+        Bumps the change counters of `tables`. Runs as its own short transaction,
+        after the caller's write has committed, so the counter rows are only
+        locked for this one statement.
+        """
+        tables = sorted(set(tables))  # Same lock order for every caller
+        with self._cursor(commit=True) as cursor:
+            cursor.execute(
+                f"UPDATE table_version SET Version = Version + 1 WHERE Table_Name IN ({_placeholders(len(tables))})",
+                tables
+            )
+
+    @contextmanager
+    def _cursor(self, commit=False):
+        conn = self.backend.connect()
+        raw_cursor = self.backend.cursor(conn)
+        cursor = _Cursor(self.backend, raw_cursor)
+        try:
+            yield cursor
+            if commit:
+                conn.commit()
+        except self.backend.errors as err:
+            conn.rollback()
+            raise RepositoryError(str(err)) from err
+        finally:
+            raw_cursor.close()
+            conn.close()
+
+    # --- Users ---
+    def get_user(self, user_id):
+        with self._cursor() as cursor:
+            cursor.execute("SELECT USER_ID, Email, Role, PasswordHash FROM user WHERE USER_ID = %s", (user_id,))
+            return cursor.fetchone()
+
+    def get_user_by_email(self, email):
+        with self._cursor() as cursor:
+            cursor.execute("SELECT * FROM user WHERE Email = %s", (email,))
+            return cursor.fetchone()
+
+    def create_user(self, email, password_hash, role):
+        with self._cursor(commit=True) as cursor:
+            cursor.execute("INSERT INTO user (Email, PasswordHash, Role) VALUES (%s, %s, %s)", (email, password_hash, role))
+            return cursor.lastrowid
+
+    def register_user(self, email, password_hash, role, commission_perc=None):
+        """Creates the login and its client/agent profile (same ID) in one transaction."""
+        with self._cursor(commit=True) as cursor:
+            cursor.execute("INSERT INTO user (Email, PasswordHash, Role) VALUES (%s, %s, %s)", (email, password_hash, role))
+            user_id = cursor.lastrowid
+            if role == 'Client':
+                cursor.execute("INSERT INTO client (CLIENT_ID, Name) VALUES (%s, %s)", (user_id, email))
+                cursor.execute("UPDATE user SET CLIENT_ID = %s WHERE USER_ID = %s", (user_id, user_id))
+            elif role == 'Agent':
+                cursor.execute("INSERT INTO agent (AGENT_ID, Name, CommissionPerc) VALUES (%s, %s, %s)", (user_id, email, commission_perc))
+                cursor.execute("UPDATE user SET AGENT_ID = %s WHERE USER_ID = %s", (user_id, user_id))
+            return user_id
+
+    def create_db_login(self, name, password, role):
+        with self._cursor(commit=True) as cursor:
+            self.backend.create_db_login(cursor, name, password, role)
+
+    def update_password_hash(self, user_id, password_hash):
+        with self._cursor(commit=True) as cursor:
+            cursor.execute("UPDATE user SET PasswordHash = %s WHERE USER_ID = %s", (password_hash, user_id))
+
+    # --- Account Removal ---
+    def find_user_ids(self, user_ids=None, role=None, email_contains=None):
+        """IDs of users matching every given filter (no filters -> no users)."""
+        if not user_ids and not role and not email_contains:
+            return []
+        conditions, params = [], []
+        if user_ids:
+            conditions.append(f"USER_ID IN ({_placeholders(len(user_ids))})")
+            params.extend(user_ids)
+        if role:
+            conditions.append("Role = %s")
+            params.append(role)
+        if email_contains:
+            conditions.append("Email LIKE %s")
+            params.append(f"%{email_contains}%")
+        with self._cursor() as cursor:
+            cursor.execute(f"SELECT USER_ID FROM user WHERE {' AND '.join(conditions)} ORDER BY USER_ID", params)
+            return [row['USER_ID'] for row in cursor.fetchall()]
+
+    def _select_ids(self, cursor, sql, ids, column, chunk_size):
+        found = set()
+        for chunk in _chunks(ids, chunk_size):
+            cursor.execute(sql.format(ids=_placeholders(len(chunk))), chunk)
+            found.update(row[column] for row in cursor.fetchall())
+        return found
+
+    def _run_chunked(self, cursor, sql, ids, chunk_size, leading_params=()):
+        """Runs a set-based statement over `ids` in IN-list chunks; returns rows affected."""
+        affected = 0
+        for chunk in _chunks(ids, chunk_size):
+            cursor.execute(sql.format(ids=_placeholders(len(chunk))), (*leading_params, *chunk))
+            affected += cursor.rowcount
+        return affected
+
+    def _plan_removal(self, cursor, user_ids, reassign_agent_id, reassign_client_id, chunk_size):
+        """Works out which rows a removal of `user_ids` touches. Read-only."""
+        users = []
+        for chunk in _chunks(user_ids, chunk_size):
+            cursor.execute(
+                f"SELECT USER_ID, Role, CLIENT_ID, AGENT_ID FROM user WHERE USER_ID IN ({_placeholders(len(chunk))})",
+                chunk
+            )
+            users.extend(cursor.fetchall())
+
+        plan = {
+            'user_ids': {u['USER_ID'] for u in users},
+            'client_ids': {u['CLIENT_ID'] for u in users if u['Role'] == 'Client' and u['CLIENT_ID']},
+            'agent_ids': {u['AGENT_ID'] for u in users if u['Role'] == 'Agent' and u['AGENT_ID']},
+        }
+        # Accounts from before signup filled in the link have it NULL; their profile row
+        # shares the user's ID, unless another login already claims that row
+        unlinked_clients = [u['USER_ID'] for u in users if u['Role'] == 'Client' and not u['CLIENT_ID']]
+        unlinked_agents = [u['USER_ID'] for u in users if u['Role'] == 'Agent' and not u['AGENT_ID']]
+        plan['client_ids'] |= self._select_ids(cursor, """
+            SELECT CLIENT_ID FROM client
+            WHERE CLIENT_ID IN ({ids})
+              AND CLIENT_ID NOT IN (SELECT CLIENT_ID FROM user WHERE CLIENT_ID IS NOT NULL)
+        """, unlinked_clients, 'CLIENT_ID', chunk_size)
+        plan['agent_ids'] |= self._select_ids(cursor, """
+            SELECT AGENT_ID FROM agent
+            WHERE AGENT_ID IN ({ids})
+              AND AGENT_ID NOT IN (SELECT AGENT_ID FROM user WHERE AGENT_ID IS NOT NULL)
+        """, unlinked_agents, 'AGENT_ID', chunk_size)
+        if reassign_agent_id in plan['agent_ids'] or reassign_client_id in plan['client_ids']:
+            raise ValueError("Cannot reassign records to an account that is being removed.")
+
+        # Contracts/properties owned by a removed client or agent are deleted unless reassigned
+        contract_ids, property_ids, commission_ids = set(), set(), set()
+        if reassign_client_id is None:
+            contract_ids |= self._select_ids(cursor, "SELECT CONTRACT_ID FROM contract WHERE CLIENT_ID IN ({ids})", plan['client_ids'], 'CONTRACT_ID', chunk_size)
+            property_ids |= self._select_ids(cursor, "SELECT PROPERTY_ID FROM property WHERE CLIENT_ID IN ({ids})", plan['client_ids'], 'PROPERTY_ID', chunk_size)
+        if reassign_agent_id is None:
+            contract_ids |= self._select_ids(cursor, "SELECT CONTRACT_ID FROM contract WHERE AGENT_ID IN ({ids})", plan['agent_ids'], 'CONTRACT_ID', chunk_size)
+            property_ids |= self._select_ids(cursor, "SELECT PROPERTY_ID FROM property WHERE AGENT_ID IN ({ids})", plan['agent_ids'], 'PROPERTY_ID', chunk_size)
+            commission_ids = self._select_ids(cursor, "SELECT COMMISSION_ID FROM earns WHERE AGENT_ID IN ({ids})", plan['agent_ids'], 'COMMISSION_ID', chunk_size)
+
+        plan['contract_ids'] = contract_ids
+        plan['property_ids'] = property_ids
+        plan['commission_ids'] = commission_ids
+        return plan
+
+    def plan_account_removal(self, user_ids, reassign_agent_id=None, reassign_client_id=None, chunk_size=REMOVAL_CHUNK_SIZE):
+        """Dry run of remove_accounts(): how many rows of each table would be touched."""
+        with self._cursor() as cursor:
+            plan = self._plan_removal(cursor, user_ids, reassign_agent_id, reassign_client_id, chunk_size)
+            payments = 0
+            for chunk in _chunks(plan['contract_ids'], chunk_size):
+                cursor.execute(f"SELECT COUNT(*) AS n FROM payment WHERE CONTRACT_ID IN ({_placeholders(len(chunk))})", chunk)
+                payments += cursor.fetchone()['n']
+        return {
+            'user': len(plan['user_ids']),
+            'client': len(plan['client_ids']),
+            'agent': len(plan['agent_ids']),
+            'contract': len(plan['contract_ids']),
+            'property': len(plan['property_ids']),
+            'payment': payments,
+            'commission': len(plan['commission_ids']),
+        }
+
+    def remove_accounts(self, user_ids, reassign_agent_id=None, reassign_client_id=None, delete_owned=False,
+                        batch_size=REMOVAL_BATCH_SIZE, chunk_size=REMOVAL_CHUNK_SIZE, pause=0.0):
+        """
+        Removes user accounts together with their client/agent rows and everything that
+        depends on them (phones, properties, contracts, payments, commissions).
+        Rows owned by a removed agent (or client) are moved to `reassign_agent_id`
+        (or `reassign_client_id`) instead. Deleting them needs `delete_owned=True`;
+        without it a removal that would delete any raises ValueError. Both checks run
+        on the full set of accounts before anything is written.
+
+        Accounts are processed `batch_size` at a time, one transaction per batch, using
+        set-based statements over IN-lists of at most `chunk_size` IDs. `pause` seconds
+        between batches gives other writers a turn at the locks.
+        Returns a Counter of rows deleted (by table) and reassigned ('<table>_reassigned').
+        If a batch fails, raises RemovalIncomplete carrying the counts of the batches
+        already committed.
+        """
+        user_ids = set(user_ids)
+        with self._cursor() as cursor:
+            plan = self._plan_removal(cursor, user_ids, reassign_agent_id, reassign_client_id, chunk_size)
+        if not delete_owned and (plan['property_ids'] or plan['contract_ids'] or plan['commission_ids']):
+            raise ValueError(
+                f"These accounts still own {len(plan['property_ids'])} property(ies), {len(plan['contract_ids'])} "
+                f"contract(s) and {len(plan['commission_ids'])} commission(s). Reassign them or confirm deleting them."
+            )
+
+        counts = Counter()
+        batches = list(_chunks(user_ids, batch_size))
+        for i, batch in enumerate(batches):
+            batch_counts = Counter()
+            try:
+                with self._cursor(commit=True) as cursor:
+                    plan = self._plan_removal(cursor, batch, reassign_agent_id, reassign_client_id, chunk_size)
+
+                    def run(sql, ids, *leading_params):
+                        return self._run_chunked(cursor, sql, ids, chunk_size, leading_params)
+
+                    # Reassign first, so nothing below deletes a row that's moving
+                    if reassign_agent_id is not None:
+                        batch_counts['contract_reassigned'] += run("UPDATE contract SET AGENT_ID = %s WHERE AGENT_ID IN ({ids})", plan['agent_ids'], reassign_agent_id)
+                        batch_counts['property_reassigned'] += run("UPDATE property SET AGENT_ID = %s WHERE AGENT_ID IN ({ids})", plan['agent_ids'], reassign_agent_id)
+                        batch_counts['earns_reassigned'] += run("UPDATE earns SET AGENT_ID = %s WHERE AGENT_ID IN ({ids})", plan['agent_ids'], reassign_agent_id)
+                    if reassign_client_id is not None:
+                        batch_counts['contract_reassigned'] += run("UPDATE contract SET CLIENT_ID = %s WHERE CLIENT_ID IN ({ids})", plan['client_ids'], reassign_client_id)
+                        batch_counts['property_reassigned'] += run("UPDATE property SET CLIENT_ID = %s WHERE CLIENT_ID IN ({ids})", plan['client_ids'], reassign_client_id)
+
+                    # Children before parents
+                    batch_counts['payment'] += run("DELETE FROM payment WHERE CONTRACT_ID IN ({ids})", plan['contract_ids'])
+                    batch_counts['propertycontract'] += run("DELETE FROM propertycontract WHERE CONTRACT_ID IN ({ids})", plan['contract_ids'])
+                    batch_counts['propertycontract'] += run("DELETE FROM propertycontract WHERE PROPERTY_ID IN ({ids})", plan['property_ids'])
+                    batch_counts['contract'] += run("DELETE FROM contract WHERE CONTRACT_ID IN ({ids})", plan['contract_ids'])
+                    batch_counts['property'] += run("DELETE FROM property WHERE PROPERTY_ID IN ({ids})", plan['property_ids'])
+                    batch_counts['earns'] += run("DELETE FROM earns WHERE COMMISSION_ID IN ({ids})", plan['commission_ids'])
+                    batch_counts['commission'] += run("DELETE FROM commission WHERE COMMISSION_ID IN ({ids})", plan['commission_ids'])
+                    batch_counts['clientphone'] += run("DELETE FROM clientphone WHERE CLIENT_ID IN ({ids})", plan['client_ids'])
+                    batch_counts['agentphone'] += run("DELETE FROM agentphone WHERE AGENT_ID IN ({ids})", plan['agent_ids'])
+                    batch_counts['user'] += run("DELETE FROM user WHERE USER_ID IN ({ids})", plan['user_ids'])
+                    batch_counts['client'] += run("DELETE FROM client WHERE CLIENT_ID IN ({ids})", plan['client_ids'])
+                    batch_counts['agent'] += run("DELETE FROM agent WHERE AGENT_ID IN ({ids})", plan['agent_ids'])
+            except RepositoryError as err:
+                raise RemovalIncomplete(f"batch {i + 1} of {len(batches)} failed: {err}", counts) from err
+            counts.update(batch_counts)
+
+            if pause and i < len(batches) - 1:
+                time.sleep(pause)
+        return counts
+
+    # --- Admin Reports ---
+    def admin_stats(self):
+        with self._cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) AS client_count FROM client")
+            client_count = cursor.fetchone()['client_count']
+            cursor.execute("SELECT COUNT(*) AS agent_count FROM agent")
+            agent_count = cursor.fetchone()['agent_count']
+            cursor.execute("SELECT COUNT(*) AS property_count FROM property")
+            property_count = cursor.fetchone()['property_count']
+            cursor.execute("SELECT SUM(Amount) AS total_payment FROM payment")
+            total_payment = cursor.fetchone()['total_payment']
+        return {
+            'client_count': client_count,
+            'agent_count': agent_count,
+            'property_count': property_count,
+            'total_payment': total_payment,
+        }
+
+    def properties_page(self):
+        """Every property with its agent and client names, most expensive first (3-table JOIN)."""
+        with self._cursor() as cursor:
+            cursor.execute("""
+                SELECT
+                    p.PROPERTY_ID, p.Street, p.PRICE,
+                    a.Name AS AgentName,
+                    c.Name AS ClientName
+                FROM property p
+                JOIN agent a ON p.AGENT_ID = a.AGENT_ID
+                JOIN client c ON p.CLIENT_ID = c.CLIENT_ID
+                ORDER BY p.PRICE DESC
+            """)
+            return cursor.fetchall()
+
+    def agents_in_city(self, city):
+        """Agents whose office is in `city` (nested query)."""
+        with self._cursor() as cursor:
+            cursor.execute("""
+                SELECT * FROM agent
+                WHERE OFFICE_ID IN (
+                    SELECT OFFICE_ID FROM office WHERE City = %s
+                )
+            """, (city,))
+            return cursor.fetchall()
+
+    def high_value_clients(self, limit=10):
+        with self._cursor() as cursor:
+            cursor.execute("""
+                SELECT
+                    cl.CLIENT_ID,
+                    cl.Name,
+                    COUNT(p.Payment_No) AS NumPayments,
+                    SUM(p.Amount) AS TotalPayments
+                FROM client cl
+                JOIN contract c ON cl.CLIENT_ID = c.CLIENT_ID
+                JOIN payment p ON c.CONTRACT_ID = p.CONTRACT_ID
+                GROUP BY cl.CLIENT_ID, cl.Name
+                ORDER BY TotalPayments DESC
+                LIMIT %s
+            """, (limit,))
+            return cursor.fetchall()
+
+    def agent_total_sales(self, agent_id):
+        with self._cursor() as cursor:
+            return self.backend.agent_total_sales(cursor, agent_id)
+
+    def list_agents(self):
+        with self._cursor() as cursor:
+            cursor.execute("SELECT AGENT_ID, Name FROM agent")
+            return cursor.fetchall()
+
+    # --- Properties ---
+    def get_property(self, property_id):
+        with self._cursor() as cursor:
+            cursor.execute("SELECT * FROM property WHERE PROPERTY_ID = %s", (property_id,))
+            return cursor.fetchone()
+
+    def update_property_price(self, property_id, price):
+        # Fires the trg_PropertyPriceAudit trigger
+        with self._cursor(commit=True) as cursor:
+            cursor.execute("UPDATE property SET PRICE = %s WHERE PROPERTY_ID = %s", (price, property_id))
+
+    def add_property(self, street, city, state, zip_code, price, prop_type, size, client_id, agent_id):
+        with self._cursor(commit=True) as cursor:
+            cursor.execute(
+                "INSERT INTO property (Street, City, State, ZIP, PRICE, TYPE, SIZE, CLIENT_ID, AGENT_ID) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                (street, city, state, zip_code, price, prop_type, size, client_id, agent_id)
+            )
+            return cursor.lastrowid
+
+    # --- Contracts & Payments ---
+    def add_contract(self, start_date, end_date, amount, client_id, agent_id):
+        with self._cursor(commit=True) as cursor:
+            cursor.execute(
+                "INSERT INTO contract (Start_Date, End_Date, Amount, CLIENT_ID, AGENT_ID) VALUES (%s, %s, %s, %s, %s)",
+                (start_date, end_date, amount, client_id, agent_id)
+            )
+            return cursor.lastrowid
+
+    def contract_choices(self):
+        """Contracts with client and agent names, for dropdowns."""
+        with self._cursor() as cursor:
+            cursor.execute("""
+                SELECT c.CONTRACT_ID, cl.Name AS ClientName, a.Name AS AgentName
+                FROM contract c
+                JOIN client cl ON c.CLIENT_ID = cl.CLIENT_ID
+                JOIN agent a ON c.AGENT_ID = a.AGENT_ID
+            """)
+            return cursor.fetchall()
+
+    def list_payments(self):
+        # Payments still waiting on a commission would be:
+        #   SELECT p.* FROM payment p
+        #   LEFT JOIN commission comm ON comm.COMMISSION_ID IN (
+        #       SELECT e.COMMISSION_ID FROM earns e WHERE e.AGENT_ID IN (
+        #           SELECT c.AGENT_ID FROM contract c WHERE c.CONTRACT_ID = p.CONTRACT_ID))
+        #   WHERE comm.COMMISSION_ID IS NULL
+        # but the page lists every payment.
+        with self._cursor() as cursor:
+            cursor.execute("SELECT * FROM payment")
+            return cursor.fetchall()
+
+    def add_payment(self, payment_date, amount, contract_id):
+        with self._cursor(commit=True) as cursor:
+            cursor.execute(
+                "INSERT INTO payment (Payment_Date, Amount, CONTRACT_ID) VALUES (%s, %s, %s)",
+                (payment_date, amount, contract_id)
+            )
+            return cursor.lastrowid
+
+    def generate_commission(self, payment_no):
+        """Runs sp_GenerateCommission (or its SQLite equivalent) for one payment."""
+        with self._cursor(commit=True) as cursor:
+            self.backend.generate_commission(cursor, payment_no)
+
+    def expiring_contracts_for_agent(self, agent_id, today):
+        """Reads the pre-computed notice table (indexed on AGENT_ID, End_Date), not contract itself."""
+        with self._cursor() as cursor:
+            cursor.execute("""
+                SELECT n.CONTRACT_ID, n.End_Date, n.Amount, cl.Name AS ClientName
+                FROM contract_expiry_notice n
+                JOIN client cl ON n.CLIENT_ID = cl.CLIENT_ID
+                WHERE n.AGENT_ID = %s AND n.End_Date >= %s
+                ORDER BY n.End_Date
+            """, (agent_id, today))
+            return cursor.fetchall()
+
+    # --- Contract Expiry Scanner ---
+    def _upsert_notices(self, cursor, where, params):
+        """
+        Copies the contracts matching `where` into the notice table, refreshing any
+        already there. Returns how many notices were added: the upsert's rowcount
+        can't tell (MySQL counts each updated row twice), so they're counted first.
+        """
+        cursor.execute(f"""
+            SELECT COUNT(*) AS added
+            FROM contract
+            WHERE {where}
+              AND NOT EXISTS (SELECT 1 FROM contract_expiry_notice n WHERE n.CONTRACT_ID = contract.CONTRACT_ID)
+        """, params)
+        added = cursor.fetchone()['added']
+        cursor.execute(f"""
+            INSERT INTO contract_expiry_notice (CONTRACT_ID, {', '.join(NOTICE_COLUMNS)})
+            SELECT CONTRACT_ID, {', '.join(NOTICE_COLUMNS)}
+            FROM contract
+            WHERE {where}
+            {self.backend.upsert_clause(['CONTRACT_ID'], NOTICE_COLUMNS)}
+        """, params)
+        return added
+
+    def scan_expiring_contracts(self, days=EXPIRY_WINDOW_DAYS, today=None, now=None):
+        """
+        Keeps `contract_expiry_notice` filled with every contract whose End_Date falls
+        within `days` days of `today`. Each run only touches what changed since the
+        previous one (tracked in `expiry_scan_state`):
+          * notices for contracts that have already ended are dropped
+          * contracts whose End_Date just slid into the window are added (an index range scan)
+          * contracts edited or created since the last run are re-checked (via Updated_At).
+            The look-back starts CHANGE_MARGIN_SECONDS before the previous run: a write
+            whose transaction started before that run but committed after it carries an
+            older Updated_At, and would otherwise never be re-checked. Re-checking a
+            contract twice is harmless.
+        `today` and `now` default to the database clock, the one Updated_At is stamped with.
+        Runs in a single transaction and returns a dict of row counts.
+        """
+        counts = {'expired': 0, 'entered_window': 0, 'changed': 0, 'full_rebuild': False}
+        with self._cursor(commit=True) as cursor:
+            if today is None or now is None:
+                db_today, db_now = self.backend.current_date_and_time(cursor)
+                today = db_today if today is None else today
+                now = db_now if now is None else now
+            window_end = today + timedelta(days=days)
+
+            cursor.execute(
+                "SELECT Window_Days, Window_End, Last_Run FROM expiry_scan_state WHERE Scan_Name = %s"
+                + self.backend.lock_rows_clause,
+                (EXPIRY_SCAN_NAME,)
+            )
+            state = cursor.fetchone()
+
+            if state is None or state['Window_Days'] != days:
+                # First run, or the window size changed: rebuild from scratch
+                counts['full_rebuild'] = True
+                cursor.execute("DELETE FROM contract_expiry_notice")
+                counts['entered_window'] = self._upsert_notices(
+                    cursor, "End_Date BETWEEN %s AND %s", (today, window_end)
+                )
+            else:
+                changed_since = state['Last_Run'] - timedelta(seconds=CHANGE_MARGIN_SECONDS)
+
+                # Contracts that have already ended
+                cursor.execute("DELETE FROM contract_expiry_notice WHERE End_Date < %s", (today,))
+                counts['expired'] = cursor.rowcount
+
+                # Contracts that slid into the window since the last run
+                counts['entered_window'] = self._upsert_notices(
+                    cursor, "End_Date > %s AND End_Date <= %s", (state['Window_End'], window_end)
+                )
+
+                # Contracts created or edited since (just before) the last run: drop and re-check them
+                cursor.execute("""
+                    DELETE FROM contract_expiry_notice
+                    WHERE CONTRACT_ID IN (SELECT CONTRACT_ID FROM contract WHERE Updated_At >= %s)
+                """, (changed_since,))
+                counts['changed'] = self._upsert_notices(
+                    cursor, "Updated_At >= %s AND End_Date BETWEEN %s AND %s", (changed_since, today, window_end)
+                )
+
+            cursor.execute(f"""
+                INSERT INTO expiry_scan_state (Scan_Name, Window_Days, Window_End, Last_Run)
+                VALUES (%s, %s, %s, %s)
+                {self.backend.upsert_clause(['Scan_Name'], ['Window_Days', 'Window_End', 'Last_Run'])}
+            """, (EXPIRY_SCAN_NAME, days, window_end, now))
+        return counts
+
+    def expiring_contracts_by_agent(self):
+        """Returns [(agent_id, agent_name, [notice, ...]), ...] ordered by agent and End_Date."""
+        with self._cursor() as cursor:
+            cursor.execute("""
+                SELECT n.AGENT_ID, a.Name AS AgentName, n.CONTRACT_ID, cl.Name AS ClientName, n.End_Date, n.Amount
+                FROM contract_expiry_notice n
+                JOIN agent a ON n.AGENT_ID = a.AGENT_ID
+                JOIN client cl ON n.CLIENT_ID = cl.CLIENT_ID
+                ORDER BY n.AGENT_ID, n.End_Date
+            """)
+            rows = cursor.fetchall()
+
+        grouped = []
+        for agent_id, notices in groupby(rows, key=lambda r: r['AGENT_ID']):
+            notices = list(notices)
+            grouped.append((agent_id, notices[0]['AgentName'], notices))
+        return grouped
+
+    # --- Commissions ---
+    def add_commission(self, agent_id, amount, percentage, earned_date):
+        with self._cursor(commit=True) as cursor:
+            cursor.execute("INSERT INTO commission (Amount, Percentage) VALUES (%s, %s)", (amount, percentage))
+            commission_id = cursor.lastrowid
+            cursor.execute(
+                "INSERT INTO earns (AGENT_ID, COMMISSION_ID, Earned_Date) VALUES (%s, %s, %s)",
+                (agent_id, commission_id, earned_date)
+            )
+            return commission_id
+
+    def agent_earnings(self, agent_id):
+        with self._cursor() as cursor:
+            cursor.execute("""
+                SELECT c.Amount, c.Percentage, e.Earned_Date
+                FROM commission c
+                JOIN earns e ON c.COMMISSION_ID = e.COMMISSION_ID
+                WHERE e.AGENT_ID = %s
+            """, (agent_id,))
+            return cursor.fetchall()
+
+    # --- Clients ---
+    def list_clients(self):
+        with self._cursor() as cursor:
+            cursor.execute("SELECT CLIENT_ID, Name FROM client")
+            return cursor.fetchall()
+
+    def get_client_profile(self, client_id):
+        with self._cursor() as cursor:
+            cursor.execute("""
+                SELECT CLIENT_ID, Name, Fname, Lname, AddressStreet, City, State, ZIPCode
+                FROM client
+                WHERE CLIENT_ID = %s
+            """, (client_id,))
+            profile = cursor.fetchone()
+            if profile:
+                cursor.execute("SELECT PhoneNumber FROM clientphone WHERE CLIENT_ID = %s ORDER BY PhoneNumber", (client_id,))
+                profile['PhoneNumber'] = '; '.join(row['PhoneNumber'] for row in cursor.fetchall())
+            return profile
+
+    def update_client_profile(self, client_id, fname, lname, street, city, state, zip_code, phone):
+        """Saves the client form. `phone` may list several numbers separated by ';'; they replace the current ones."""
+        results, _ = self.import_clients([{
+            'client_id': client_id, 'fname': fname, 'lname': lname, 'street': street,
+            'city': city, 'state': state, 'zip': zip_code, 'phones': phone,
+        }])
+        if results[0]['status'] == 'error':
+            raise RepositoryError(results[0]['error'])
+
+    # --- Bulk Client Import ---
+    def import_clients(self, records, replace_phones=True, batch_size=IMPORT_BATCH_SIZE):
+        """
+        Creates or updates many clients and their phone numbers. Each record is a dict
+        with any of client_id, name, fname, lname, street, city, state, zip and phones
+        (a list, or a string separated by ';' or ','). A record with a client_id updates
+        that client, keeping the current value of any field it leaves out; one without
+        creates a new client. Rows for the same client are merged. With `replace_phones`
+        a client's phones become exactly the ones listed; otherwise they are added.
+
+        Records are applied about `batch_size` at a time, one transaction per batch, with
+        multi-row statements: a joined UPDATE for existing clients (locked when read, so a
+        concurrent removal is reported as "not found" rather than re-created) and an
+        upsert for the phones. A batch that fails is rolled
+        back and its records reported as errors; the other batches still apply.
+        Returns (results, summary): one result per record in input order
+        ({row, client_id, status: created/updated/error, phones, error}), and totals
+        including the elapsed seconds and records per second. `row` is the record's
+        'line' (e.g. its line in a CSV file) if it has one, else its 1-based position.
+        """
+        started = time.perf_counter()
+        results = [
+            {'row': record.get('line', i), 'client_id': None, 'status': None, 'phones': 0, 'error': None}
+            for i, record in enumerate(records, 1)
+        ]
+
+        # Validate, then group rows by client so each client's rows land in the same batch
+        groups, by_client = [], {}
+        for i, record in enumerate(records):
+            try:
+                client_id, values, phones = _parse_import_record(record)
+            except ValueError as err:
+                results[i].update(status='error', error=str(err))
+                continue
+            group = by_client.get(client_id)
+            if group is None:
+                group = {'client_id': client_id, 'values': {}, 'phones': None, 'rows': [], 'status': None, 'error': None}
+                groups.append(group)
+                if client_id is not None:
+                    by_client[client_id] = group
+            group['values'].update(values)
+            if phones is not None:
+                if group['phones'] is None:
+                    group['phones'] = []
+                group['phones'] += [p for p in phones if p not in group['phones']]
+            group['rows'].append(i)
+            results[i]['client_id'] = client_id
+
+        batches, batch, batch_rows = [], [], 0
+        for group in groups:
+            batch.append(group)
+            batch_rows += len(group['rows'])
+            if batch_rows >= batch_size:
+                batches.append(batch)
+                batch, batch_rows = [], 0
+        if batch:
+            batches.append(batch)
+
+        counts = Counter()
+        for batch in batches:
+            try:
+                with self._cursor(commit=True) as cursor:
+                    batch_counts = self._import_batch(cursor, batch, replace_phones)
+            except RepositoryError as err:
+                for group in batch:
+                    for i in group['rows']:
+                        results[i].update(status='error', error=str(err))
+                continue
+            counts.update(batch_counts)
+            for group in batch:
+                for i in group['rows']:
+                    if group['error']:
+                        results[i].update(status='error', error=group['error'])
+                    else:
+                        results[i].update(client_id=group['client_id'], status=group['status'], phones=len(group['phones'] or []))
+
+        seconds = time.perf_counter() - started
+        summary = {
+            'records': len(records),
+            'created': sum(1 for r in results if r['status'] == 'created'),
+            'updated': sum(1 for r in results if r['status'] == 'updated'),
+            'errors': sum(1 for r in results if r['status'] == 'error'),
+            'phones_added': counts['phones_added'],
+            'phones_removed': counts['phones_removed'],
+            'batches': len(batches),
+            'seconds': round(seconds, 3),
+            'records_per_second': round(len(records) / seconds, 1) if seconds else None,
+        }
+        return results, summary
+
+    def _import_batch(self, cursor, batch, replace_phones):
+        """Applies one batch of grouped import records inside the caller's transaction."""
+        counts = Counter()
+        columns = ', '.join(CLIENT_COLUMNS)
+
+        # One read for every existing client in the batch; fields a record leaves out come from here.
+        # The rows stay locked until commit, so a concurrent removal can't slip in before the update.
+        existing_ids = [g['client_id'] for g in batch if g['client_id'] is not None]
+        current = {}
+        if existing_ids:
+            cursor.execute(
+                f"SELECT CLIENT_ID, {columns} FROM client WHERE CLIENT_ID IN ({_placeholders(len(existing_ids))})"
+                + self.backend.lock_rows_clause,
+                existing_ids
+            )
+            current = {row['CLIENT_ID']: row for row in cursor.fetchall()}
+
+        updates = []
+        for group in batch:
+            if group['client_id'] is None:
+                continue
+            row = current.get(group['client_id'])
+            if row is None:
+                group['error'] = f"Client {group['client_id']} not found"
+                continue
+            merged = {**row, **group['values']}
+            updates.append([group['client_id']] + [merged[c] for c in CLIENT_COLUMNS])
+            group['status'] = 'updated'
+
+        # One multi-row UPDATE per chunk, joined to the new values. Unlike an upsert
+        # it can never re-create a client that has been removed.
+        for chunk in _slices(updates, IMPORT_ROWS_PER_STATEMENT):
+            cursor.execute(
+                self.backend.bulk_update_sql('client', 'CLIENT_ID', CLIENT_COLUMNS, len(chunk)),
+                [value for row in chunk for value in row]
+            )
+
+        # New clients go in one at a time: their phones need each generated ID,
+        # and a multi-row INSERT only reports the first
+        for group in batch:
+            if group['client_id'] is None:
+                cursor.execute(
+                    f"INSERT INTO client ({columns}) VALUES ({_placeholders(len(CLIENT_COLUMNS))})",
+                    [group['values'].get(c) for c in CLIENT_COLUMNS]
+                )
+                group['client_id'] = cursor.lastrowid
+                group['status'] = 'created'
+
+        phone_groups = [g for g in batch if g['status'] and g['phones'] is not None]
+        phone_rows = [(g['client_id'], phone) for g in phone_groups for phone in g['phones']]
+
+        # One read of the phones already on file, so only real changes are written
+        on_file = set()
+        updated_ids = [g['client_id'] for g in phone_groups if g['status'] == 'updated']
+        if updated_ids:
+            cursor.execute(
+                f"SELECT CLIENT_ID, PhoneNumber FROM clientphone WHERE CLIENT_ID IN ({_placeholders(len(updated_ids))})",
+                updated_ids
+            )
+            on_file = {(row['CLIENT_ID'], row['PhoneNumber']) for row in cursor.fetchall()}
+
+        if replace_phones:
+            stale = sorted(on_file - set(phone_rows))
+            for chunk in _slices(stale, IMPORT_ROWS_PER_STATEMENT):
+                cursor.execute(
+                    f"DELETE FROM clientphone WHERE (CLIENT_ID, PhoneNumber) IN ({_values_rows(len(chunk), 2)})",
+                    [value for row in chunk for value in row]
+                )
+                counts['phones_removed'] += cursor.rowcount
+
+        # The upsert skips a phone another writer added since the read instead of failing the batch.
+        # Skipped rows aren't affected rows (the connection doesn't set CLIENT_FOUND_ROWS),
+        # so rowcount is the number actually inserted.
+        new_rows = [row for row in phone_rows if row not in on_file]
+        for chunk in _slices(new_rows, IMPORT_ROWS_PER_STATEMENT):
+            cursor.execute(
+                f"INSERT INTO clientphone (CLIENT_ID, PhoneNumber) VALUES {_values_rows(len(chunk), 2)} "
+                + self.backend.upsert_clause(['CLIENT_ID', 'PhoneNumber'], []),
+                [value for row in chunk for value in row]
+            )
+            counts['phones_added'] += cursor.rowcount
+        return counts
+
+    def client_payments(self, client_id):
+        with self._cursor() as cursor:
+            cursor.execute("""
+                SELECT p.Payment_Date, p.CONTRACT_ID, p.Amount
+                FROM payment p
+                JOIN contract c ON p.CONTRACT_ID = c.CONTRACT_ID
+                WHERE c.CLIENT_ID = %s
+            """, (client_id,))
+            return cursor.fetchall()
+
+    def client_properties(self, client_id):
+        with self._cursor() as cursor:
+            cursor.execute("SELECT * FROM property WHERE CLIENT_ID = %s", (client_id,))
+            return cursor.fetchall()
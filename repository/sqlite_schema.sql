@@ -0,0 +1,197 @@
+-- -----------------------------------------------------
+-- SQLite translation of database/mysqltables.sql
+-- Used by the SQLite backend (in-memory tests, benchmarks, profiling).
+-- Keep it in step with the MySQL schema. Differences:
+--   * AUTO_INCREMENT -> INTEGER PRIMARY KEY AUTOINCREMENT
+--   * ENUM -> TEXT + CHECK
+--   * ON UPDATE CURRENT_TIMESTAMP -> AFTER UPDATE trigger
+--   * sp_GenerateCommission / fn_GetAgentTotalSales are reimplemented
+--     in repository/backends.py (SQLiteBackend)
+-- -----------------------------------------------------
+
+CREATE TABLE IF NOT EXISTS client (
+  CLIENT_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+  Name VARCHAR(100) NOT NULL,
+  Fname VARCHAR(50) NULL,
+  Lname VARCHAR(50) NULL,
+  Hire_Date DATE NULL,
+  AddressStreet VARCHAR(100),
+  City VARCHAR(50),
+  State VARCHAR(50),
+  ZIPCode VARCHAR(10)
+);
+
+CREATE TABLE IF NOT EXISTS clientphone (
+  CLIENT_ID INT NOT NULL,
+  PhoneNumber VARCHAR(45) NOT NULL,
+  PRIMARY KEY (CLIENT_ID, PhoneNumber),
+  FOREIGN KEY (CLIENT_ID) REFERENCES client (CLIENT_ID) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS office (
+  OFFICE_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+  Name VARCHAR(100) NOT NULL,
+  Street VARCHAR(100) NULL,
+  City VARCHAR(50) NULL,
+  State VARCHAR(50) NULL,
+  ZIP VARCHAR(20) NULL
+);
+
+CREATE TABLE IF NOT EXISTS officephone (
+  OFFICE_ID INT NOT NULL,
+  PhoneNumber VARCHAR(45) NOT NULL,
+  PRIMARY KEY (OFFICE_ID, PhoneNumber),
+  FOREIGN KEY (OFFICE_ID) REFERENCES office (OFFICE_ID) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS agent (
+  AGENT_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+  Name VARCHAR(100) NOT NULL,
+  Fname VARCHAR(50) NULL,
+  Lname VARCHAR(50) NULL,
+  LicenseNumber VARCHAR(100) NULL,
+  CommissionPerc DECIMAL(5, 2) NULL,
+  Hire_Date DATE NULL,
+  OFFICE_ID INT NULL,
+  Supervisor_ID INT NULL,
+  FOREIGN KEY (OFFICE_ID) REFERENCES office (OFFICE_ID) ON DELETE SET NULL,
+  FOREIGN KEY (Supervisor_ID) REFERENCES agent (AGENT_ID) ON DELETE SET NULL
+);
+
+CREATE TABLE IF NOT EXISTS agentphone (
+  AGENT_ID INT NOT NULL,
+  PhoneNumber VARCHAR(45) NOT NULL,
+  PRIMARY KEY (AGENT_ID, PhoneNumber),
+  FOREIGN KEY (AGENT_ID) REFERENCES agent (AGENT_ID) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS user (
+  USER_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+  Email VARCHAR(100) NOT NULL UNIQUE,
+  PasswordHash VARCHAR(255) NOT NULL,
+  Role TEXT NOT NULL CHECK (Role IN ('Admin', 'Agent', 'Client')),
+  AGENT_ID INT NULL UNIQUE,
+  CLIENT_ID INT NULL UNIQUE,
+  FOREIGN KEY (AGENT_ID) REFERENCES agent (AGENT_ID) ON DELETE SET NULL,
+  FOREIGN KEY (CLIENT_ID) REFERENCES client (CLIENT_ID) ON DELETE SET NULL
+);
+
+CREATE TABLE IF NOT EXISTS property (
+  PROPERTY_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+  Street VARCHAR(100) NULL,
+  City VARCHAR(50) NULL,
+  State VARCHAR(50) NULL,
+  ZIP VARCHAR(20) NULL,
+  SIZE DECIMAL(10, 2) NULL,
+  TYPE VARCHAR(50) NULL,
+  PRICE DECIMAL(12, 2) NULL,
+  CLIENT_ID INT NOT NULL,
+  AGENT_ID INT NOT NULL,
+  FOREIGN KEY (CLIENT_ID) REFERENCES client (CLIENT_ID),
+  FOREIGN KEY (AGENT_ID) REFERENCES agent (AGENT_ID)
+);
+
+CREATE TABLE IF NOT EXISTS contract (
+  CONTRACT_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+  Start_Date DATE NULL,
+  End_Date DATE NULL,
+  Amount DECIMAL(12, 2) NULL,
+  CLIENT_ID INT NOT NULL,
+  AGENT_ID INT NOT NULL,
+  Updated_At TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  FOREIGN KEY (CLIENT_ID) REFERENCES client (CLIENT_ID),
+  FOREIGN KEY (AGENT_ID) REFERENCES agent (AGENT_ID)
+);
+
+CREATE INDEX IF NOT EXISTS idx_contract_end_date ON contract (End_Date);
+CREATE INDEX IF NOT EXISTS idx_contract_updated_at ON contract (Updated_At);
+
+CREATE TABLE IF NOT EXISTS payment (
+  Payment_No INTEGER PRIMARY KEY AUTOINCREMENT,
+  Payment_Date DATE NULL,
+  Amount DECIMAL(12, 2) NULL,
+  CONTRACT_ID INT NOT NULL,
+  FOREIGN KEY (CONTRACT_ID) REFERENCES contract (CONTRACT_ID)
+);
+
+CREATE TABLE IF NOT EXISTS commission (
+  COMMISSION_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+  Percentage DECIMAL(5, 2) NULL,
+  Amount DECIMAL(12, 2) NULL,
+  CommissionPerc DECIMAL(5, 2) NULL
+);
+
+CREATE TABLE IF NOT EXISTS propertycontract (
+  PROPERTY_ID INT NOT NULL,
+  CONTRACT_ID INT NOT NULL,
+  PRIMARY KEY (PROPERTY_ID, CONTRACT_ID),
+  FOREIGN KEY (PROPERTY_ID) REFERENCES property (PROPERTY_ID) ON DELETE CASCADE,
+  FOREIGN KEY (CONTRACT_ID) REFERENCES contract (CONTRACT_ID) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS earns (
+  EARNS_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+  Earned_Date DATE NULL,
+  AGENT_ID INT NOT NULL,
+  COMMISSION_ID INT NOT NULL UNIQUE,
+  FOREIGN KEY (AGENT_ID) REFERENCES agent (AGENT_ID),
+  FOREIGN KEY (COMMISSION_ID) REFERENCES commission (COMMISSION_ID)
+);
+
+-- Trigger: property price audit
+CREATE TABLE IF NOT EXISTS property_price_audit (
+  Audit_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+  PROPERTY_ID INT,
+  Old_Price DECIMAL(12, 2),
+  New_Price DECIMAL(12, 2),
+  Change_Timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_PropertyPriceAudit
+BEFORE UPDATE ON property
+FOR EACH ROW
+WHEN OLD.PRICE <> NEW.PRICE
+BEGIN
+  INSERT INTO property_price_audit (PROPERTY_ID, Old_Price, New_Price)
+  VALUES (OLD.PROPERTY_ID, OLD.PRICE, NEW.PRICE);
+END;
+
+-- Stands in for MySQL's ON UPDATE CURRENT_TIMESTAMP
+CREATE TRIGGER IF NOT EXISTS trg_contract_updated_at
+AFTER UPDATE ON contract
+FOR EACH ROW
+WHEN NEW.Updated_At = OLD.Updated_At
+BEGIN
+  UPDATE contract SET Updated_At = CURRENT_TIMESTAMP WHERE CONTRACT_ID = NEW.CONTRACT_ID;
+END;
+
+-- Change-version tracking (used for HTTP caching); bumped by the app after each commit
+CREATE TABLE IF NOT EXISTS table_version (
+  Table_Name VARCHAR(64) NOT NULL PRIMARY KEY,
+  Version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO table_version (Table_Name, Version)
+VALUES ('user', 0), ('client', 0), ('clientphone', 0), ('agent', 0), ('property', 0),
+       ('contract', 0), ('payment', 0), ('commission', 0), ('earns', 0);
+
+-- Contract expiry scanner tables
+CREATE TABLE IF NOT EXISTS contract_expiry_notice (
+  CONTRACT_ID INT NOT NULL PRIMARY KEY,
+  AGENT_ID INT NOT NULL,
+  CLIENT_ID INT NOT NULL,
+  End_Date DATE NOT NULL,
+  Amount DECIMAL(12, 2) NULL,
+  Noticed_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  FOREIGN KEY (CONTRACT_ID) REFERENCES contract (CONTRACT_ID) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_notice_agent_end ON contract_expiry_notice (AGENT_ID, End_Date);
+CREATE INDEX IF NOT EXISTS idx_notice_end_date ON contract_expiry_notice (End_Date);
+
+CREATE TABLE IF NOT EXISTS expiry_scan_state (
+  Scan_Name VARCHAR(50) NOT NULL PRIMARY KEY,
+  Window_Days INT NOT NULL,
+  Window_End DATE NOT NULL,
+  Last_Run DATETIME NOT NULL
+);
@@ -0,0 +1,79 @@
+"""
+Fixtures for the test suite. Everything runs on the in-process SQLite backend,
+so no MySQL server is needed:
+
+    python -m pytest
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+import cache
+from app import create_app
+from repository import create_repository
+
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    """The version and fragment caches are process-wide; start every test cold."""
+    cache._db_versions = {}
+    cache._db_versions_loaded_at = 0.0
+    cache._local_versions.clear()
+    cache.fragment_cache.clear()
+    yield
+
+
+@pytest.fixture
+def repo():
+    repository = create_repository('sqlite')
+    yield repository
+    repository.backend.close()
+
+
+@pytest.fixture
+def data(repo):
+    """
+    Two agents and two clients, each with a login (profile ID == user ID, as signup
+    creates them), plus an admin. Agent 1 handles one property and one contract
+    (with two payments) for client 1. Returns the IDs.
+    """
+    ids = {'admin': repo.create_user('admin@test.com', 'x', 'Admin')}
+    for name, role in [('agent1', 'Agent'), ('agent2', 'Agent'), ('client1', 'Client'), ('client2', 'Client')]:
+        ids[name] = repo.register_user(f'{name}@test.com', 'x', role, Decimal('5.00') if role == 'Agent' else None)
+
+    today = date.today()
+    ids['property'] = repo.add_property('1 Main St', 'Boston', 'MA', '02101', Decimal('500000'), 'House', 120, ids['client1'], ids['agent1'])
+    ids['contract'] = repo.add_contract(today, today + timedelta(days=365), Decimal('500000'), ids['client1'], ids['agent1'])
+    repo.add_payment(today, Decimal('1000'), ids['contract'])
+    repo.add_payment(today, Decimal('2000'), ids['contract'])
+    return ids
+
+
+@pytest.fixture
+def app(repo):
+    return create_app({'TESTING': True, 'REPOSITORY': repo, 'ADMISSION_ENABLED': False,
+                       'SECRET_KEY': 'test', 'BUILD_ID': 'build-1'})
+
+
+@pytest.fixture
+def admin(app, data):
+    """A test client logged in as the admin."""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(data['admin'])
+        session['_fresh'] = True
+    return client
+
+
+@pytest.fixture
+def execute(repo):
+    """Runs one statement on a raw connection (for setting up states the app can't create)."""
+    def run(sql, params=()):
+        conn = repo.connect()
+        try:
+            conn.execute(sql, params)
+            conn.commit()
+        finally:
+            conn.close()
+    return run
@@ -0,0 +1,91 @@
+import pytest
+
+from repository import RemovalIncomplete, RepositoryError
+
+
+def count(repo, sql, params=()):
+    with repo._cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchone()['n']
+
+
+# --- Account Removal ---
+def test_remove_accounts_refuses_to_delete_owned_records_without_confirmation(repo, data):
+    with pytest.raises(ValueError, match="still own"):
+        repo.remove_accounts([data['agent1']])
+
+    assert repo.get_user(data['agent1']) is not None
+    assert count(repo, "SELECT COUNT(*) AS n FROM payment") == 2
+
+
+def test_remove_accounts_deletes_owned_records_when_confirmed(repo, data):
+    counts = repo.remove_accounts([data['agent1']], delete_owned=True)
+
+    assert counts['user'] == 1 and counts['agent'] == 1
+    assert counts['contract'] == 1 and counts['payment'] == 2 and counts['property'] == 1
+    assert count(repo, "SELECT COUNT(*) AS n FROM contract") == 0
+
+
+def test_remove_accounts_reassigns_owned_records(repo, data):
+    counts = repo.remove_accounts([data['agent1']], reassign_agent_id=data['agent2'])
+
+    assert counts['contract_reassigned'] == 1 and counts['property_reassigned'] == 1
+    assert counts['payment'] == 0
+    assert count(repo, "SELECT COUNT(*) AS n FROM contract WHERE AGENT_ID = %s", (data['agent2'],)) == 1
+
+
+def test_remove_accounts_checks_reassign_target_before_the_first_batch(repo, data):
+    with pytest.raises(ValueError, match="being removed"):
+        repo.remove_accounts([data['agent1'], data['agent2']], reassign_agent_id=data['agent2'], batch_size=1)
+
+    # Nothing was committed
+    assert repo.get_user(data['agent1']) is not None
+    assert count(repo, "SELECT COUNT(*) AS n FROM contract WHERE AGENT_ID = %s", (data['agent1'],)) == 1
+
+
+def test_remove_accounts_reports_counts_of_committed_batches(repo, data, monkeypatch):
+    run_chunked = repo._run_chunked
+    user_deletes = []
+
+    def fail_second_batch(cursor, sql, ids, chunk_size, leading_params=()):
+        if sql.startswith("DELETE FROM user"):
+            user_deletes.append(ids)
+            if len(user_deletes) == 2:
+                raise RepositoryError("disk full")
+        return run_chunked(cursor, sql, ids, chunk_size, leading_params)
+
+    monkeypatch.setattr(repo, '_run_chunked', fail_second_batch)
+    with pytest.raises(RemovalIncomplete) as excinfo:
+        repo.remove_accounts([data['client2'], data['admin']], batch_size=1)
+
+    assert excinfo.value.counts['user'] == 1
+    assert count(repo, "SELECT COUNT(*) AS n FROM user") == 4
+
+
+def test_remove_accounts_finds_profiles_of_unlinked_accounts(repo, data, execute):
+    # Accounts from the old signup code have NULL profile links
+    execute("UPDATE user SET CLIENT_ID = NULL WHERE USER_ID = ?", (data['client2'],))
+
+    counts = repo.remove_accounts([data['client2']])
+
+    assert counts['user'] == 1 and counts['client'] == 1
+    assert repo.get_client_profile(data['client2']) is None
+
+
+# --- Routes ---
+def test_delete_user_only_previews(admin, repo, data):
+    response = admin.get(f"/delete_user/{data['client2']}")
+
+    assert response.status_code == 302
+    assert '/remove_accounts' in response.headers['Location']
+    assert repo.get_user(data['client2']) is not None
+
+
+def test_remove_accounts_removes_the_previewed_ids(admin, repo, data):
+    response = admin.post('/remove_accounts', data={
+        'action': 'remove', 'previewed_ids': [str(data['client2'])],
+    })
+
+    assert response.status_code == 302
+    assert repo.get_user(data['client2']) is None
+    assert repo.get_user(data['client1']) is not None
@@ -0,0 +1,162 @@
+import pytest
+
+from admission import AdmissionController
+from app import create_app
+
+# Buckets that never refill during a test, so the burst is all there is
+SLOW = 0.001
+
+
+def admission_app(repo, **config):
+    return create_app({'TESTING': True, 'REPOSITORY': repo, 'SECRET_KEY': 'test', **config})
+
+
+def log_in(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    return client
+
+
+# --- Admission Controller ---
+def test_user_buckets_are_per_user():
+    controller = AdmissionController({'page': {'user_rate': SLOW, 'user_burst': 2}})
+
+    assert controller.admit('page', 'user:1') == (None, None)
+    assert controller.admit('page', 'user:1') == (None, None)
+    semaphore, (status, retry_after) = controller.admit('page', 'user:1')
+    assert status == 429 and retry_after > 1
+    assert controller.admit('page', 'user:2') == (None, None)
+    assert controller.stats()['page'] == {'admitted': 3, 'rejected': {'user_rate': 1}}
+
+
+def test_route_bucket_is_shared_by_everyone():
+    controller = AdmissionController({'page': {'route_rate': SLOW, 'route_burst': 2}})
+
+    assert controller.admit('page', 'user:1') == (None, None)
+    assert controller.admit('page', 'user:2') == (None, None)
+    assert controller.admit('page', 'user:3')[1][0] == 429
+    assert controller.stats()['page']['rejected'] == {'route_rate': 1}
+
+
+def test_concurrency_cap_fails_fast_until_released():
+    controller = AdmissionController({'page': {'max_concurrent': 1}})
+
+    semaphore, rejection = controller.admit('page', 'user:1')
+    assert semaphore is not None and rejection is None
+    assert controller.admit('page', 'user:2') == (None, (503, 1))
+
+    semaphore.release()
+    assert controller.admit('page', 'user:2')[1] is None
+
+
+def test_signed_out_requests_skip_the_limits_of_private_routes():
+    controller = AdmissionController(
+        {'page': {'user_rate': SLOW, 'user_burst': 1, 'route_rate': SLOW, 'route_burst': 1, 'max_concurrent': 1}},
+        anonymous_limits={'ip_rate': SLOW, 'ip_burst': 100},
+    )
+
+    # Login redirects only: no route tokens or semaphore slots are used up
+    for _ in range(5):
+        assert controller.admit('page', 'ip:10.0.0.1', authenticated=False) == (None, None)
+    semaphore, rejection = controller.admit('page', 'user:1')
+    assert rejection is None
+    semaphore.release()
+
+
+def test_signed_out_requests_pay_the_limits_of_public_routes():
+    controller = AdmissionController(
+        {'signup': {'route_rate': SLOW, 'route_burst': 1, 'public': True}},
+        anonymous_limits={'ip_rate': SLOW, 'ip_burst': 100},
+    )
+
+    assert controller.admit('signup', 'ip:10.0.0.1', authenticated=False) == (None, None)
+    assert controller.admit('signup', 'ip:10.0.0.2', authenticated=False)[1][0] == 429
+    assert controller.stats()['signup']['rejected'] == {'route_rate': 1}
+
+
+def test_signed_out_requests_share_one_bucket_per_ip():
+    controller = AdmissionController({}, anonymous_limits={'ip_rate': SLOW, 'ip_burst': 2})
+
+    assert controller.admit('a', 'ip:10.0.0.1', authenticated=False)[1] is None
+    assert controller.admit('b', 'ip:10.0.0.1', authenticated=False)[1] is None
+    assert controller.admit('a', 'ip:10.0.0.1', authenticated=False)[1][0] == 429
+    assert controller.admit('a', 'ip:10.0.0.2', authenticated=False)[1] is None
+    assert controller.stats()['a']['rejected'] == {'anonymous_rate': 1}
+
+
+# --- Flask Integration ---
+def test_rejections_answer_429_with_retry_after(repo, data):
+    app = admission_app(repo, ADMISSION_LIMITS={'main.properties': {'user_rate': SLOW, 'user_burst': 1}})
+    admin = log_in(app, data['admin'])
+
+    assert admin.get('/properties').status_code == 200
+    response = admin.get('/properties')
+
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+
+
+def test_full_route_answers_503(repo, data):
+    app = admission_app(repo, ADMISSION_LIMITS={'main.properties': {'max_concurrent': 1}})
+    held, _ = app.extensions['admission'].admit('main.properties', 'user:other')  # Another request in flight
+
+    response = log_in(app, data['admin']).get('/properties')
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    held.release()
+
+
+def test_slot_is_released_after_each_request_even_if_the_view_raises(repo, data):
+    app = admission_app(repo, ADMISSION_LIMITS={'boom': {'max_concurrent': 1}})
+    calls = []
+
+    def boom():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("view failed")
+        return 'ok'
+
+    app.add_url_rule('/boom', 'boom', boom)
+    client = log_in(app, data['admin'])
+
+    with pytest.raises(RuntimeError):
+        client.get('/boom')
+    assert client.get('/boom').status_code == 200
+    assert client.get('/boom').status_code == 200
+
+
+def test_health_checks_are_never_limited(repo, data):
+    app = admission_app(repo, ADMISSION_ANONYMOUS_LIMITS={'ip_rate': SLOW, 'ip_burst': 1})
+    client = app.test_client()
+
+    assert [client.get('/healthz').status_code for _ in range(5)] == [200] * 5
+    assert [client.get('/readyz').status_code for _ in range(3)] == [200] * 3
+    assert client.get('/').status_code == 200
+    assert client.get('/').status_code == 429
+
+
+def test_admission_stats_reports_the_counters(repo, data):
+    app = admission_app(repo, ADMISSION_LIMITS={'main.properties': {'user_rate': SLOW, 'user_burst': 1},
+                                                'main.admission_stats': {}})
+    admin = log_in(app, data['admin'])
+    admin.get('/properties')
+    admin.get('/properties')
+
+    stats = admin.get('/admission_stats').get_json()
+
+    assert stats['main.properties'] == {'admitted': 1, 'rejected': {'user_rate': 1}}
+
+
+# --- Reverse Proxies ---
+@pytest.mark.parametrize('hops, expected', [(0, [200, 429]), (1, [200, 200])])
+def test_signed_out_visitors_are_keyed_by_their_forwarded_ip(repo, hops, expected):
+    app = admission_app(repo, TRUSTED_PROXY_HOPS=hops,
+                        ADMISSION_ANONYMOUS_LIMITS={'ip_rate': 0.001, 'ip_burst': 1})
+    client = app.test_client()
+
+    statuses = [client.get('/', headers={'X-Forwarded-For': ip}).status_code for ip in ('203.0.113.1', '203.0.113.2')]
+
+    assert statuses == expected
@@ -0,0 +1,61 @@
+from app import ACCOUNT_REMOVAL_TABLES
+
+
+# --- Conditional GET ---
+def test_unchanged_page_answers_304(admin):
+    first = admin.get('/properties')
+    assert first.status_code == 200
+    assert first.headers['ETag']
+
+    again = admin.get('/properties', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_write_invalidates_the_etag(admin, data):
+    etag = admin.get('/properties').headers['ETag']
+
+    admin.post(f"/edit_property/{data['property']}", data={'price': '650000'})
+
+    response = admin.get('/properties', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert b'650' in response.data
+
+
+def test_new_build_invalidates_the_etag(app, admin):
+    etag = admin.get('/properties').headers['ETag']
+
+    app.config['BUILD_ID'] = 'build-2'
+
+    assert admin.get('/properties', headers={'If-None-Match': etag}).status_code == 200
+
+
+# --- Change Versions ---
+def test_table_versions_are_bumped_explicitly(repo, data):
+    before = repo.table_versions()
+    repo.bump_table_versions(['property', 'payment', 'clientphone'])
+    after = repo.table_versions()
+
+    assert after['property'] == before['property'] + 1
+    assert after['payment'] == before['payment'] + 1
+    assert after['client'] == before['client']
+
+
+def test_flash_after_a_write_does_not_block_later_304s(admin, data):
+    admin.post(f"/edit_property/{data['property']}", data={'price': '650000'})
+
+    shown = admin.get('/properties')  # Renders (and so clears) the "price updated" flash
+    assert b'price updated' in shown.data
+
+    again = admin.get('/properties', headers={'If-None-Match': shown.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_every_table_the_app_marks_changed_has_a_counter(repo):
+    # ACCOUNT_REMOVAL_TABLES covers every table any write route marks as changed
+    before = repo.table_versions()
+    assert set(ACCOUNT_REMOVAL_TABLES) <= set(before)
+
+    repo.bump_table_versions(['user', 'earns', 'commission'])
+    after = repo.table_versions()
+    assert [after[t] - before[t] for t in ('user', 'earns', 'commission')] == [1, 1, 1]
@@ -0,0 +1,100 @@
+import pytest
+
+from app import parse_client_csv
+from repository import RepositoryError
+
+
+# --- Bulk Client Import ---
+def test_import_clients_reports_each_record(repo, data):
+    results, summary = repo.import_clients([
+        {'client_id': data['client1'], 'fname': 'Ann', 'phones': '555-1; 555-2'},
+        {'client_id': data['client1'], 'phones': ['555-3']},  # Same client: merged
+        {'name': 'New Client', 'phones': '777'},
+        {'client_id': 'abc'},
+        {'client_id': 9999, 'city': 'Nowhere'},
+    ], batch_size=2)
+
+    assert [r['status'] for r in results] == ['updated', 'updated', 'created', 'error', 'error']
+    assert results[1]['phones'] == 3
+    assert "Invalid client ID" in results[3]['error']
+    assert results[4]['error'] == "Client 9999 not found"
+    assert summary['created'] == 1 and summary['updated'] == 2 and summary['errors'] == 2
+    assert summary['phones_added'] == 4
+    assert summary['records_per_second'] > 0
+
+    profile = repo.get_client_profile(data['client1'])
+    assert profile['Fname'] == 'Ann'
+    assert profile['Name'] == 'client1@test.com'  # Left out, so kept
+    assert profile['PhoneNumber'] == '555-1; 555-2; 555-3'
+    assert repo.get_client_profile(results[2]['client_id'])['Name'] == 'New Client'
+
+
+def test_import_clients_replaces_or_adds_phones(repo, data):
+    repo.import_clients([{'client_id': data['client1'], 'phones': '1; 2'}])
+
+    _, summary = repo.import_clients([{'client_id': data['client1'], 'phones': '2; 3'}])
+    assert (summary['phones_added'], summary['phones_removed']) == (1, 1)
+    assert repo.get_client_profile(data['client1'])['PhoneNumber'] == '2; 3'
+
+    _, summary = repo.import_clients([{'client_id': data['client1'], 'phones': '3; 4'}], replace_phones=False)
+    assert (summary['phones_added'], summary['phones_removed']) == (1, 0)
+    assert repo.get_client_profile(data['client1'])['PhoneNumber'] == '2; 3; 4'
+
+
+def test_import_clients_never_recreates_a_removed_client(repo, data):
+    repo.remove_accounts([data['client2']])
+
+    results, _ = repo.import_clients([{'client_id': data['client2'], 'city': 'Boston'}])
+
+    assert results[0]['status'] == 'error'
+    assert repo.get_client_profile(data['client2']) is None
+
+
+def test_update_client_profile_goes_through_the_import(repo, data):
+    repo.update_client_profile(data['client1'], 'A', 'B', '1 St', 'Boston', 'MA', '02101', '555-1; 555-2')
+    assert repo.get_client_profile(data['client1'])['PhoneNumber'] == '555-1; 555-2'
+
+    repo.update_client_profile(data['client1'], 'A', 'B', '1 St', 'Boston', 'MA', '02101', '')
+    assert repo.get_client_profile(data['client1'])['PhoneNumber'] == ''
+
+    with pytest.raises(RepositoryError, match="not found"):
+        repo.update_client_profile(9999, 'A', 'B', '', '', '', '', '')
+
+
+# --- CSV Upload ---
+def test_parse_client_csv_keeps_duplicate_columns():
+    records = parse_client_csv("Name,City,Phone,Phone\nAlice,Boston,111,222\nBob,,,\n")
+
+    assert records == [
+        {'name': 'Alice', 'city': 'Boston', 'phones': '111;222', 'line': 2},
+        {'name': 'Bob', 'line': 3},
+    ]
+
+
+def test_parse_client_csv_numbers_records_by_csv_line():
+    text = 'name,street\nAlice,1 Main St\n\n,\nBob,"Flat 2\n9 High St"\nCarol,3 Elm St\n'
+
+    assert [r['line'] for r in parse_client_csv(text)] == [2, 5, 7]
+
+
+def test_import_clients_command_reports_csv_lines(app, data, tmp_path):
+    csv_file = tmp_path / 'clients.csv'
+    csv_file.write_text("client_id,city\n\n4,Boston\nabc,Nowhere\n")
+
+    result = app.test_cli_runner().invoke(args=['import-clients', str(csv_file)])
+
+    assert result.exit_code == 0
+    assert "Line 4: Invalid client ID: 'abc'" in result.output
+
+
+def test_profile_form_shows_the_update_error(app, data):
+    agent = app.test_client()
+    with agent.session_transaction() as session:
+        session['_user_id'] = str(data['agent1'])
+        session['_fresh'] = True
+
+    agent.post('/add_client', data={'client_id': '9999', 'fname': 'A', 'lname': 'B', 'phone': '',
+                                    'street': '', 'city': '', 'state': '', 'zip': ''})
+
+    with agent.session_transaction() as session:
+        assert session['_flashes'] == [('error', "Client 9999 not found")]
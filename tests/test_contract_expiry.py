@@ -0,0 +1,139 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from repository.repository import CHANGE_MARGIN_SECONDS
+
+# A fixed calendar well after the fixture's own contract ends
+DAY = date(2030, 1, 1)
+NOON = datetime(2030, 1, 1, 12, 0)
+
+
+@pytest.fixture
+def contract(repo, data):
+    """Adds a contract for agent 1 / client 1 ending `days` after DAY, last edited long ago."""
+    def add(days):
+        contract_id = repo.add_contract(DAY - timedelta(days=365), DAY + timedelta(days=days), Decimal('1000'),
+                                        data['client1'], data['agent1'])
+        touch(repo, contract_id, NOON - timedelta(days=30))
+        return contract_id
+    return add
+
+
+def touch(repo, contract_id, updated_at, end_days=None):
+    """Sets Updated_At as a write committed at `updated_at` would (optionally moving End_Date)."""
+    with repo._cursor(commit=True) as cursor:
+        if end_days is None:
+            cursor.execute("UPDATE contract SET Updated_At = %s WHERE CONTRACT_ID = %s", (updated_at, contract_id))
+        else:
+            cursor.execute("UPDATE contract SET End_Date = %s, Updated_At = %s WHERE CONTRACT_ID = %s",
+                           (DAY + timedelta(days=end_days), updated_at, contract_id))
+
+
+def scan(repo, day, days=30):
+    """Runs the scan as if it were noon on DAY + `day`."""
+    return repo.scan_expiring_contracts(days, today=DAY + timedelta(days=day), now=NOON + timedelta(days=day))
+
+
+def noticed(repo):
+    return sorted(n['CONTRACT_ID'] for _, _, notices in repo.expiring_contracts_by_agent() for n in notices)
+
+
+def test_first_run_rebuilds_the_window(repo, contract):
+    ended, soon, later, outside = contract(-1), contract(5), contract(30), contract(31)
+
+    counts = scan(repo, 0)
+
+    assert counts == {'expired': 0, 'entered_window': 2, 'changed': 0, 'full_rebuild': True}
+    assert noticed(repo) == [soon, later]
+    assert ended not in noticed(repo) and outside not in noticed(repo)
+
+
+def test_window_moves_with_today(repo, contract):
+    soon, later, far = contract(5), contract(20), contract(40)
+    scan(repo, 0)
+
+    counts = scan(repo, 10)
+
+    assert counts == {'expired': 1, 'entered_window': 1, 'changed': 0, 'full_rebuild': False}
+    assert noticed(repo) == [later, far]
+
+
+def test_rerun_on_the_same_day_changes_nothing(repo, contract):
+    contract(5)
+    scan(repo, 0)
+
+    assert scan(repo, 0) == {'expired': 0, 'entered_window': 0, 'changed': 0, 'full_rebuild': False}
+
+
+def test_only_contracts_without_a_notice_count_as_entered(repo, contract):
+    first, second = contract(35), contract(36)
+    scan(repo, 0)
+    with repo._cursor(commit=True) as cursor:  # Already noticed, e.g. by an interrupted earlier run
+        cursor.execute(
+            "INSERT INTO contract_expiry_notice (CONTRACT_ID, AGENT_ID, CLIENT_ID, End_Date, Amount) "
+            "SELECT CONTRACT_ID, AGENT_ID, CLIENT_ID, End_Date, Amount FROM contract WHERE CONTRACT_ID = %s",
+            (first,)
+        )
+
+    counts = scan(repo, 10)
+
+    assert counts['entered_window'] == 1
+    assert noticed(repo) == [first, second]
+
+
+def test_edited_contracts_are_rechecked(repo, contract):
+    moved_in, moved_out = contract(200), contract(10)
+    scan(repo, 0)
+
+    # Edited after the run: one now ends inside the window, the other far outside it
+    touch(repo, moved_in, NOON + timedelta(hours=1), end_days=12)
+    touch(repo, moved_out, NOON + timedelta(hours=1), end_days=300)
+    counts = scan(repo, 1)
+
+    assert counts['changed'] == 1
+    assert noticed(repo) == [moved_in]
+
+
+def test_recheck_looks_back_for_late_commits(repo, contract):
+    late, too_old = contract(200), contract(200)
+    scan(repo, 0)
+
+    # Both committed after the run, but stamped when their transactions started
+    touch(repo, late, NOON - timedelta(seconds=CHANGE_MARGIN_SECONDS - 60), end_days=12)
+    touch(repo, too_old, NOON - timedelta(seconds=CHANGE_MARGIN_SECONDS + 60), end_days=12)
+    counts = scan(repo, 1)
+
+    assert counts['changed'] == 1
+    assert noticed(repo) == [late]
+
+
+def test_new_window_size_rebuilds(repo, contract):
+    soon, later = contract(5), contract(50)
+    scan(repo, 0)
+
+    counts = scan(repo, 1, days=60)
+
+    assert counts['full_rebuild']
+    assert noticed(repo) == [soon, later]
+
+
+def test_agent_page_reads_the_notices(repo, data, contract):
+    soon = contract(5)
+    scan(repo, 0)
+
+    rows = repo.expiring_contracts_for_agent(data['agent1'], DAY)
+
+    assert [r['CONTRACT_ID'] for r in rows] == [soon]
+    assert repo.expiring_contracts_for_agent(data['agent2'], DAY) == []
+
+
+def test_expire_contracts_command(app, repo, data):
+    # The fixture's contract ends in a year: outside 30 days, inside 400
+    result = app.test_cli_runner().invoke(args=['expire-contracts', '--days', '400'])
+
+    assert result.exit_code == 0
+    assert "Expiry scan (400 days)" in result.output
+    assert "1 contract(s) expiring" in result.output
+    assert noticed(repo) == [data['contract']]
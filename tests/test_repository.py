@@ -0,0 +1,34 @@
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+
+def test_sqlite_returns_the_same_types_as_mysql(repo, data):
+    prop = repo.get_property(data['property'])
+    assert prop['PRICE'] == Decimal('500000')
+
+    payments = repo.list_payments()
+    assert isinstance(payments[0]['Payment_Date'], date)
+    assert payments[0]['Amount'] == Decimal('1000')
+
+
+def test_agent_total_sales_matches_the_stored_function(repo, data):
+    assert repo.agent_total_sales(data['agent1']) == Decimal('500000')
+    assert repo.agent_total_sales(data['agent2']) == 0
+
+
+def test_generate_commission_matches_the_stored_procedure(repo, data):
+    payment_no = repo.list_payments()[0]['Payment_No']
+
+    repo.generate_commission(payment_no)
+
+    earnings = repo.agent_earnings(data['agent1'])
+    assert len(earnings) == 1
+    assert earnings[0]['Amount'] == Decimal('50.00')  # 5% of 1000
+
+
+def test_current_date_and_time_reads_the_database_clock(repo):
+    with repo._cursor() as cursor:
+        today, now = repo.backend.current_date_and_time(cursor)
+
+    assert isinstance(today, date) and isinstance(now, datetime)
+    assert abs(now - datetime.now(timezone.utc).replace(tzinfo=None)) < timedelta(minutes=1)  # SQLite's clock is UTC
@@ -0,0 +1,102 @@
+import app as app_module
+from app import create_app, warm_up
+from cache import fragment_cache
+from repository import ConnectionFailed
+
+
+def test_create_app_does_not_touch_the_database():
+    # Nothing listens on this port: any connection attempt would fail the request
+    app = create_app({'TESTING': True, 'ADMISSION_ENABLED': False,
+                      'DB_CONFIG': {'host': '127.0.0.1', 'port': 1, 'user': 'nobody', 'database': 'none'}})
+
+    assert 'repository' not in app.extensions
+    assert app.test_client().get('/healthz').status_code == 200
+    assert 'repository' not in app.extensions
+
+
+# --- Health Checks ---
+def test_healthz(app):
+    assert app.test_client().get('/healthz').status_code == 200
+
+
+def test_readyz_waits_for_the_warm_up(app, repo, monkeypatch):
+    def unreachable():
+        raise ConnectionFailed("connection refused")
+
+    monkeypatch.setattr(repo, 'warm_up', unreachable)
+    response = app.test_client().get('/readyz')
+    assert response.status_code == 503
+    assert response.get_json()['status'] == 'warming up'
+
+    monkeypatch.undo()
+    response = app.test_client().get('/readyz')
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'ready'
+
+
+def test_readyz_reports_a_database_outage_after_the_warm_up(app, repo, monkeypatch):
+    assert warm_up(app)
+
+    def unreachable():
+        raise ConnectionFailed("connection refused")
+
+    monkeypatch.setattr(repo, 'ping', unreachable)
+    response = app.test_client().get('/readyz')
+    assert response.status_code == 503
+    assert response.get_json()['status'] == 'database unavailable'
+
+
+# --- Warm-Up ---
+def test_warm_up_renders_the_admin_fragments(app, admin):
+    assert warm_up(app)
+    assert app.extensions['startup']['ready']
+    assert len(fragment_cache._items) == len(app_module.ADMIN_FRAGMENTS)
+
+    misses = fragment_cache.misses
+    assert admin.get('/properties').status_code == 200
+    assert fragment_cache.misses == misses  # Served from the warm-up's render
+
+
+def test_warm_up_fails_softly_without_a_database(app, repo, monkeypatch):
+    def unreachable():
+        raise ConnectionFailed("connection refused")
+
+    monkeypatch.setattr(repo, 'warm_up', unreachable)
+
+    assert not warm_up(app)
+    assert not app.extensions['startup']['ready']
+
+
+# --- Admin Bootstrap ---
+def test_create_admin_creates_then_keeps_the_account(app, repo, monkeypatch):
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['create-admin', '--email', 'boss@test.com', '--password', 'secret'])
+    assert result.exit_code == 0
+    assert "Admin user created" in result.output
+    assert repo.get_user_by_email('boss@test.com')['Role'] == 'Admin'
+
+    hashes = []
+    monkeypatch.setattr(app_module, 'generate_password_hash', lambda password: hashes.append(password))
+    result = runner.invoke(args=['create-admin', '--email', 'boss@test.com', '--password', 'secret'])
+    assert result.exit_code == 0
+    assert "already exists" in result.output
+    assert hashes == []
+
+
+def test_create_admin_resets_a_changed_password(app, repo):
+    runner = app.test_cli_runner()
+    runner.invoke(args=['create-admin', '--email', 'boss@test.com', '--password', 'secret'])
+    before = repo.get_user_by_email('boss@test.com')['PasswordHash']
+
+    result = runner.invoke(args=['create-admin', '--email', 'boss@test.com', '--password', 'changed'])
+
+    assert "password updated" in result.output
+    assert repo.get_user_by_email('boss@test.com')['PasswordHash'] != before
+
+
+def test_create_admin_refuses_a_non_admin_email(app, repo, data):
+    result = app.test_cli_runner().invoke(args=['create-admin', '--email', 'client1@test.com'])
+
+    assert result.exit_code != 0
+    assert "not an Admin account" in result.output
+    assert repo.get_user_by_email('client1@test.com')['Role'] == 'Client'